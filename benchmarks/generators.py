@@ -0,0 +1,122 @@
+import random
+from contextlib import contextmanager
+from math import dist
+from string import ascii_uppercase
+from typing import Dict, Iterator, List, Tuple
+from utils.csp import CSP
+from utils.weighted_graph import WeightedGraph
+from challenges.maze import Maze, MazeLocation
+from challenges.map_coloring import MapColoringConstraint
+from challenges.queens import QueensConstraint
+from challenges.word_search import GridLocation, WordSearchConstraint, generate_domain, generate_grid
+
+"""
+BENCHMARK INPUTS
+Seeded generators for problems much larger than the examples in challenges/. The same arguments always produce the
+same instance, so timings from different runs (and different versions of the code) are comparable. Maze and the word
+search grid draw from the module level random, so they are built with it temporarily reseeded.
+"""
+
+Point = Tuple[float, float]
+
+
+# reseed the global random generator for the duration of the block, then put its state back
+@contextmanager
+def _seeded(seed: int) -> Iterator[None]:
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+
+# vertices 0..n-1 with edges between uniformly random pairs
+def random_graph(vertices: int, edges: int, seed: int, max_weight: int = 100) -> WeightedGraph[int]:
+    rng: random.Random = random.Random(seed)
+    rows = ((rng.randrange(vertices), rng.randrange(vertices), rng.randint(1, max_weight)) for _ in range(edges))
+    return WeightedGraph.from_edges(rows, range(vertices))
+
+
+# rows x columns lattice of MazeLocations, each connected to its right and lower neighbor, weights in [1, max_weight]
+def grid_graph(rows: int, columns: int, seed: int, max_weight: int = 10) -> WeightedGraph[MazeLocation]:
+    rng: random.Random = random.Random(seed)
+    edges: List[Tuple[MazeLocation, MazeLocation, float]] = []
+    for row in range(rows):
+        for col in range(columns):
+            here: MazeLocation = MazeLocation(row, col)
+            if col + 1 < columns:
+                edges.append((here, MazeLocation(row, col + 1), rng.randint(1, max_weight)))
+            if row + 1 < rows:
+                edges.append((here, MazeLocation(row + 1, col), rng.randint(1, max_weight)))
+    return WeightedGraph.from_edges(edges, [MazeLocation(r, c) for r in range(rows) for c in range(columns)])
+
+
+# random points in the unit square, connected when closer than radius and weighted by their distance
+def geometric_graph(vertices: int, radius: float, seed: int) -> WeightedGraph[Point]:
+    rng: random.Random = random.Random(seed)
+    points: List[Point] = [(rng.random(), rng.random()) for _ in range(vertices)]
+    # bucket the points into radius sized cells so only neighboring cells need comparing
+    cells: Dict[Tuple[int, int], List[Point]] = {}
+    for point in points:
+        cells.setdefault((int(point[0] / radius), int(point[1] / radius)), []).append(point)
+    edges: List[Tuple[Point, Point, float]] = []
+    for (cx, cy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):  # each pair of cells is visited once
+            others: List[Point] = cells.get((cx + dx, cy + dy), [])
+            for i, first in enumerate(members):
+                for second in (members[i + 1:] if (dx, dy) == (0, 0) else others):
+                    length: float = dist(first, second)
+                    if length < radius:
+                        edges.append((first, second, length))
+    return WeightedGraph.from_edges(edges, points)
+
+
+# a rows x columns maze from the top left to the bottom right corner
+def maze(rows: int, columns: int, sparseness: float, seed: int) -> Maze:
+    with _seeded(seed):
+        generated: Maze = Maze(rows, columns, sparseness, MazeLocation(0, 0), MazeLocation(rows - 1, columns - 1))
+    return generated
+
+
+def queens_csp(n: int) -> CSP[int, int]:
+    columns: List[int] = list(range(1, n + 1))
+    csp: CSP[int, int] = CSP(columns, {column: list(range(1, n + 1)) for column in columns})
+    csp.add_constraint(QueensConstraint(columns))
+    return csp
+
+
+# color a rows x columns map of regions. Regions touch their horizontal and vertical neighbors and, in each 2x2 block,
+# one randomly chosen diagonal pair, so the map stays planar and four colors always suffice
+def map_coloring_csp(rows: int, columns: int, seed: int, colors: int = 4) -> CSP[str, str]:
+    rng: random.Random = random.Random(seed)
+    names: List[List[str]] = [[f"region {row}-{col}" for col in range(columns)] for row in range(rows)]
+    palette: List[str] = [f"color {i}" for i in range(colors)]
+    variables: List[str] = [name for row in names for name in row]
+    csp: CSP[str, str] = CSP(variables, {name: palette for name in variables})
+    for row in range(rows):
+        for col in range(columns):
+            if col + 1 < columns:
+                csp.add_constraint(MapColoringConstraint(names[row][col], names[row][col + 1]))
+            if row + 1 < rows:
+                csp.add_constraint(MapColoringConstraint(names[row][col], names[row + 1][col]))
+                if col + 1 < columns:
+                    if rng.random() < 0.5:
+                        csp.add_constraint(MapColoringConstraint(names[row][col], names[row + 1][col + 1]))
+                    else:
+                        csp.add_constraint(MapColoringConstraint(names[row][col + 1], names[row + 1][col]))
+    return csp
+
+
+# place count random words of 3-6 letters in a rows x columns grid
+def word_search_csp(rows: int, columns: int, count: int, seed: int) -> CSP[str, List[GridLocation]]:
+    with _seeded(seed):
+        grid = generate_grid(rows, columns)
+        words: List[str] = list(dict.fromkeys(_random_word() for _ in range(count)))  # drop repeats, keep the order
+    csp: CSP[str, List[GridLocation]] = CSP(words, {word: generate_domain(word, grid) for word in words})
+    csp.add_constraint(WordSearchConstraint(words))
+    return csp
+
+
+def _random_word() -> str:
+    return "".join(random.choice(ascii_uppercase) for _ in range(random.randint(3, 6)))
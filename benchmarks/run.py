@@ -0,0 +1,185 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+from utils.generic_search import astar, bfs, dfs
+from utils.instrumentation import SearchStats
+from challenges.djikstra import dijkstra
+from challenges.maze import manhattan_distance
+from challenges.mst import mst
+from benchmarks import generators
+
+"""
+BENCHMARK RUNNER
+Times each case on its generated input, records how many nodes it expanded (for the searches and CSPs, via SearchStats)
+and its peak memory (a separate run under tracemalloc, which is too slow to time), and appends the run to a JSON lines
+history file. Each run is compared with the previous one in the history and cases that got slower than the threshold
+are reported, with a non-zero exit status so the runner can gate a deploy.
+
+    python -m benchmarks.run --scale small
+"""
+
+Run = Callable[[Optional[SearchStats]], Any]  # runs a case once, filling in stats if the case supports them
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Run]  # builds the input (untimed) and returns the timed part
+    counts_nodes: bool = True  # False for algorithms that do not take a SearchStats
+
+
+@dataclass
+class Measurement:
+    seconds: float  # best of the repeats
+    nodes_expanded: Optional[int]
+    peak_frontier: Optional[int]
+    peak_memory: int  # bytes, as reported by tracemalloc
+
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"vertices": 20_000, "edges": 60_000, "grid": 100, "maze": 200, "queens": 12, "map": 15, "words": 8},
+    "large": {"vertices": 200_000, "edges": 600_000, "grid": 400, "maze": 1000, "queens": 16, "map": 30, "words": 20},
+}
+
+
+def cases(scale: Dict[str, int], seed: int) -> List[Case]:
+    def maze_case(search: str) -> Run:
+        maze = generators.maze(scale["maze"], scale["maze"], 0.2, seed)
+        if search == "astar":
+            return lambda stats: astar(maze.start, maze.goal_test, maze.successors, manhattan_distance(maze.goal),
+                                       stats=stats)
+        if search == "bfs_compact":
+            return lambda stats: bfs(maze.start, maze.goal_test, maze.successors, encoding=maze.encoding, stats=stats)
+        if search == "jump_point":
+            return lambda _: maze.jump_point_search()
+        return lambda stats: {"dfs": dfs, "bfs": bfs}[search](maze.start, maze.goal_test, maze.successors, stats=stats)
+
+    def graph_bfs() -> Run:
+        graph = generators.random_graph(scale["vertices"], scale["edges"], seed)
+        goal: int = scale["vertices"] - 1
+        return lambda stats: bfs(0, lambda v: v == goal, graph.iter_neighbors_for_vertex, stats=stats)
+
+    def grid_astar() -> Run:
+        graph = generators.grid_graph(scale["grid"], scale["grid"], seed)
+        start, goal = graph.vertex_at(0), graph.vertex_at(graph.vertex_count - 1)
+        return lambda stats: astar(start, lambda v: v == goal, graph.iter_neighbors_for_vertex,
+                                   manhattan_distance(goal), cost=graph.weight_between, stats=stats)
+
+    def graph_dijkstra(kind: str) -> Run:
+        graph = generators.random_graph(scale["vertices"], scale["edges"], seed) if kind == "random" else \
+            generators.geometric_graph(scale["vertices"], (8.0 / scale["vertices"]) ** 0.5, seed)
+        return lambda _: dijkstra(graph, graph.vertex_at(0))
+
+    def grid_mst() -> Run:
+        graph = generators.grid_graph(scale["grid"], scale["grid"], seed)
+        return lambda _: mst(graph)
+
+    def csp_case(csp) -> Run:
+        return lambda stats: csp.backtracking_search({}, stats=stats)
+
+    return [
+        Case("maze.dfs", lambda: maze_case("dfs")),
+        Case("maze.bfs", lambda: maze_case("bfs")),
+        Case("maze.bfs_compact", lambda: maze_case("bfs_compact")),
+        Case("maze.astar", lambda: maze_case("astar")),
+        Case("maze.jump_point", lambda: maze_case("jump_point"), counts_nodes=False),
+        Case("random_graph.bfs", graph_bfs),
+        Case("grid_graph.astar", grid_astar),
+        Case("random_graph.dijkstra", lambda: graph_dijkstra("random"), counts_nodes=False),
+        Case("geometric_graph.dijkstra", lambda: graph_dijkstra("geometric"), counts_nodes=False),
+        Case("grid_graph.mst", grid_mst, counts_nodes=False),
+        Case("csp.queens", lambda: csp_case(generators.queens_csp(scale["queens"]))),
+        Case("csp.map_coloring", lambda: csp_case(generators.map_coloring_csp(scale["map"], scale["map"], seed))),
+        Case("csp.word_search", lambda: csp_case(generators.word_search_csp(20, 20, scale["words"], seed))),
+    ]
+
+
+def measure(case: Case, repeat: int) -> Measurement:
+    run: Run = case.setup()
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = perf_counter()
+        run(None)  # timed runs go without stats so the counting does not skew them
+        best = min(best, perf_counter() - start)
+    stats: SearchStats = SearchStats()
+    if case.counts_nodes:
+        run(stats)
+    tracemalloc.start()
+    try:
+        run(None)
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Measurement(best, stats.nodes_expanded if case.counts_nodes else None,
+                       stats.peak_frontier if case.counts_nodes else None, peak)
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _last_run(history: str, scale: str) -> Optional[Dict[str, Any]]:
+    last: Optional[Dict[str, Any]] = None
+    try:
+        with open(history) as file:
+            for line in file:
+                record: Dict[str, Any] = json.loads(line)
+                if record["scale"] == scale:
+                    last = record
+    except FileNotFoundError:
+        pass
+    return last
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the searches, graph algorithms and CSPs on generated inputs.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best is kept")
+    parser.add_argument("--only", default="", help="run only the cases whose name contains this")
+    parser.add_argument("--history", default="benchmarks/history.jsonl", help="JSON lines file runs are appended to")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="report cases slower than this multiple of the previous run")
+    args = parser.parse_args(argv)
+
+    previous: Optional[Dict[str, Any]] = _last_run(args.history, args.scale)
+    results: Dict[str, Dict[str, Any]] = {}
+    slower: List[str] = []
+    for case in cases(SCALES[args.scale], args.seed):
+        if args.only not in case.name:
+            continue
+        result: Measurement = measure(case, args.repeat)
+        results[case.name] = asdict(result)
+        line: str = f"{case.name:26} {result.seconds:9.4f}s {result.peak_memory / 2 ** 20:9.2f} MiB"
+        if result.nodes_expanded is not None:
+            line += f" {result.nodes_expanded:>10} expanded"
+        if previous is not None and case.name in previous["results"]:
+            ratio: float = result.seconds / previous["results"][case.name]["seconds"]
+            line += f"  x{ratio:.2f} vs {previous['commit']}"
+            if ratio > args.threshold:
+                slower.append(case.name)
+        print(line)
+
+    with open(args.history, "a") as file:
+        file.write(json.dumps({"timestamp": datetime.now(timezone.utc).isoformat(), "commit": _commit(),
+                               "python": platform.python_version(), "scale": args.scale, "seed": args.seed,
+                               "results": results}) + "\n")
+    if slower:
+        print(f"Slower than x{args.threshold} the previous run: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import mmap
+from array import array
+from multiprocessing import Pool, cpu_count
+from typing import Generic, List, Optional, Tuple, Union, Iterator
+from utils.batch_search import load_graph, worker_graph
+from utils.csr_graph import AnyWeightedGraph
+from utils.weighted_graph import WeightedEdge, WeightedGraph, WeightedPath, V, print_weighted_path
+from challenges.djikstra import UNREACHABLE, dijkstra_to, distance_array_to_vertex_dict
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, Floyd-Warshall falls back to pure Python
+    np = None
+
+"""
+ALL PAIRS SHORTEST PATHS
+Computes the distance between every pair of vertices along with a next-hop table: next_hop[u][v] is the first vertex
+after u on a shortest path to v, so any path can be rebuilt one hop at a time without storing it. Both tables are flat
+row-major buffers (float64 distances, int32 hops) and can live in memory mapped files for graphs whose n x n tables do
+not fit in memory.
+
+Two engines are available. Floyd-Warshall relaxes the whole matrix through each vertex in turn; with NumPy each of
+those n steps is one vectorized operation, which makes it the fastest choice for small or dense graphs. For large sparse
+graphs, running dijkstra from every source is far less work, and the sources are spread over a process pool.
+all_pairs picks between them from the size and density of the graph.
+"""
+
+_NO_HOP: int = -1
+
+
+class AllPairs(Generic[V]):
+    def __init__(self, graph: AnyWeightedGraph, distances: memoryview, next_hops: memoryview) -> None:
+        self._graph = graph
+        self._n: int = graph.vertex_count
+        self._distances = distances
+        self._next_hops = next_hops
+
+    @property
+    def graph(self) -> AnyWeightedGraph:
+        return self._graph
+
+    # the raw row-major tables, distances (inf when unreachable) and next hops (-1 when there is none)
+    @property
+    def tables(self) -> Tuple[memoryview, memoryview]:
+        return self._distances, self._next_hops
+
+    def distance(self, first: V, second: V) -> Optional[float]:
+        d: float = self._distances[self._graph.index_of(first) * self._n + self._graph.index_of(second)]
+        return None if d == UNREACHABLE else d
+
+    # distances from the vertex at index in the same form dijkstra returns, for distance_array_to_vertex_dict
+    def row(self, index: int) -> List[Optional[float]]:
+        start: int = index * self._n
+        return [None if d == UNREACHABLE else d for d in self._distances[start:start + self._n]]
+
+    def path(self, first: V, second: V) -> Optional[WeightedPath]:
+        u: int = self._graph.index_of(first)
+        v: int = self._graph.index_of(second)
+        if self._distances[u * self._n + v] == UNREACHABLE:
+            return None
+        path: WeightedPath = []
+        while u != v:
+            hop: int = self._next_hops[u * self._n + v]
+            path.append(WeightedEdge(u, hop, self._distances[u * self._n + hop]))  # a hop on a shortest path is an edge
+            u = hop
+        return path
+
+
+# an n x n row-major table, in memory or in a memory mapped file, with every entry set to fill
+def _allocate(n: int, typecode: str, fill: Union[int, float], path: Optional[str]) -> memoryview:
+    row: array = array(typecode, [fill]) * n
+    if path is None or n == 0:
+        return memoryview(row * n)
+    with open(path, "w+b") as file:
+        file.truncate(n * n * row.itemsize)
+        table: memoryview = memoryview(mmap.mmap(file.fileno(), 0)).cast(typecode)
+    for i in range(n):  # a row at a time, so filling never needs the whole table in memory
+        table[i * n:(i + 1) * n] = row
+    return table
+
+
+# the distance and next hop tables for graph, the next hops go next to the distances in path + ".next"
+def _tables(graph: AnyWeightedGraph, path: Optional[str]) -> Tuple[memoryview, memoryview]:
+    n: int = graph.vertex_count
+    return _allocate(n, "d", UNREACHABLE, path), _allocate(n, "i", _NO_HOP, None if path is None else path + ".next")
+
+
+def floyd_warshall(graph: AnyWeightedGraph, path: Optional[str] = None) -> AllPairs[V]:
+    """
+    :param graph: a WeightedGraph or weighted CSRGraph.
+    :param path: store the distance table in this file (and the next hops in path + ".next") instead of memory.
+    :return: all pairs distances and next hops
+    """
+    n: int = graph.vertex_count
+    distances, next_hops = _tables(graph, path)
+    for u in range(n):
+        distances[u * n + u] = 0.0
+        next_hops[u * n + u] = u
+        for v, weight in graph.iter_neighbor_indices_with_weights(u):
+            if weight < distances[u * n + v]:  # the cheapest of any parallel edges
+                distances[u * n + v] = weight
+                next_hops[u * n + v] = v
+    if np is not None and n:
+        d = np.frombuffer(distances, dtype=np.float64).reshape(n, n)
+        hops = np.frombuffer(next_hops, dtype=np.int32).reshape(n, n)
+        for k in range(n):
+            through_k = d[:, k, None] + d[None, k, :]
+            shorter = through_k < d
+            np.copyto(d, through_k, where=shorter)
+            np.copyto(hops, np.broadcast_to(hops[:, k, None], hops.shape), where=shorter)
+    else:
+        for k in range(n):
+            row_k: List[float] = distances[k * n:(k + 1) * n].tolist()
+            for i in range(n):
+                d_ik: float = distances[i * n + k]
+                if d_ik == UNREACHABLE:
+                    continue
+                start: int = i * n
+                hop_ik: int = next_hops[start + k]
+                for j, d_kj in enumerate(row_k):
+                    if d_ik + d_kj < distances[start + j]:
+                        distances[start + j] = d_ik + d_kj
+                        next_hops[start + j] = hop_ik
+    return AllPairs(graph, distances, next_hops)
+
+
+# distances and next hops from one source, from its dijkstra tree
+def _source_row(source: int) -> Tuple[int, array, array]:
+    graph: AnyWeightedGraph = worker_graph()
+    n: int = graph.vertex_count
+    distances, tree = dijkstra_to(graph, graph.vertex_at(source))
+    predecessors: array = tree.predecessors
+    hops: array = array("i", [_NO_HOP]) * n
+    hops[source] = source
+    for target in range(n):
+        # climb towards the source until a vertex with a known first hop, then hand it down the climbed chain
+        chain: List[int] = []
+        v: int = target
+        while hops[v] == _NO_HOP and predecessors[v] >= 0:
+            chain.append(v)
+            v = predecessors[v]
+        if hops[v] == _NO_HOP:
+            continue  # unreachable
+        for w in reversed(chain):
+            hops[w] = w if v == source else hops[v]
+            v = w
+    row: array = array("d", (UNREACHABLE if d is None else d for d in distances))
+    return source, row, hops
+
+
+def _rows(graph: AnyWeightedGraph, processes: int) -> Iterator[Tuple[int, array, array]]:
+    if processes == 1:
+        load_graph(graph)
+        yield from map(_source_row, range(graph.vertex_count))
+        return
+    chunksize: int = max(1, graph.vertex_count // (processes * 4))
+    with Pool(processes, initializer=load_graph, initargs=(graph,)) as pool:
+        yield from pool.imap_unordered(_source_row, range(graph.vertex_count), chunksize)
+
+
+def parallel_dijkstra(graph: AnyWeightedGraph, processes: Optional[int] = None,
+                      path: Optional[str] = None) -> AllPairs[V]:
+    """
+    :param graph: a WeightedGraph or weighted CSRGraph.
+    :param processes: worker processes, defaults to the number of cores. 1 runs in this process.
+    :param path: store the tables in files, as in floyd_warshall.
+    :return: all pairs distances and next hops
+    """
+    n: int = graph.vertex_count
+    distances, next_hops = _tables(graph, path)
+    for source, row, hops in _rows(graph, processes or cpu_count()):
+        distances[source * n:(source + 1) * n] = row
+        next_hops[source * n:(source + 1) * n] = hops
+    return AllPairs(graph, distances, next_hops)
+
+
+def all_pairs(graph: AnyWeightedGraph, processes: Optional[int] = None, path: Optional[str] = None) -> AllPairs[V]:
+    # Floyd-Warshall does n^3 work regardless of edges, dijkstra from every source about n * m log n
+    n: int = graph.vertex_count
+    dense: bool = graph.edge_count * 8 >= n * n
+    if np is not None and (n <= 300 or dense):
+        return floyd_warshall(graph, path)
+    return parallel_dijkstra(graph, processes, path)
+
+
+if __name__ == "__main__":
+    city_graph: WeightedGraph[str] = WeightedGraph.from_edges([
+        ("Seattle", "Chicago", 1737), ("Seattle", "San Francisco", 678), ("San Francisco", "Riverside", 386),
+        ("San Francisco", "Los Angeles", 348), ("Los Angeles", "Riverside", 50), ("Los Angeles", "Phoenix", 357),
+        ("Riverside", "Phoenix", 307), ("Riverside", "Chicago", 1704), ("Phoenix", "Dallas", 887),
+        ("Phoenix", "Houston", 1015), ("Dallas", "Chicago", 805), ("Dallas", "Atlanta", 721),
+        ("Dallas", "Houston", 225), ("Houston", "Atlanta", 702), ("Houston", "Miami", 968),
+        ("Atlanta", "Chicago", 588), ("Atlanta", "Washington", 543), ("Atlanta", "Houston", 604),
+        ("Miami", "Washington", 923), ("Chicago", "Detroit", 238), ("Detroit", "Boston", 613),
+        ("Detroit", "Washington", 396), ("Detroit", "New York", 482), ("Boston", "New York", 190),
+        ("New York", "Philadelphia", 81), ("Philadelphia", "Washington", 123)])
+
+    result: AllPairs[str] = all_pairs(city_graph, processes=1)
+    print("Distances from Miami:")
+    for city, distance in distance_array_to_vertex_dict(city_graph, result.row(city_graph.index_of("Miami"))).items():
+        print(f"{city} : {distance}")
+    print("")
+    print("Shortest path from Seattle to Miami:")
+    print_weighted_path(city_graph, result.path("Seattle", "Miami"))
@@ -0,0 +1,235 @@
+from __future__ import annotations
+from array import array
+from heapq import heappop, heappush
+from typing import Dict, Generic, List, Optional, Set, Tuple
+from utils.csr_graph import AnyWeightedGraph
+from utils.weighted_graph import WeightedEdge, WeightedGraph, WeightedPath, V, print_weighted_path
+
+"""
+CONTRACTION HIERARCHIES
+Preprocessing for graphs that are queried far more often than they change. Vertices are contracted one at a time, least
+important first: a contracted vertex is taken out of the graph and, for every pair of its neighbors whose only shortest
+connection ran through it, a shortcut edge remembering that middle vertex is added between them. Whether a shortcut is
+needed is decided by a small bounded dijkstra (the witness search) that looks for another path at least as short.
+
+Every edge then points from a lower ranked vertex to a higher ranked one, and every shortest path climbs to a highest
+vertex and descends again, so a query is two tiny dijkstras that only follow upward edges, one from each end, meeting
+at the top. The route found uses shortcuts, which are unpacked recursively through their middle vertices into the
+original WeightedEdges.
+"""
+
+Pair = Tuple[int, int]  # an undirected edge, lower index first
+
+_INFINITY: float = float("inf")
+
+
+def _pair(u: int, v: int) -> Pair:
+    return (u, v) if u < v else (v, u)
+
+
+class ContractionHierarchy(Generic[V]):
+    def __init__(self, graph: AnyWeightedGraph, witness_limit: int = 500) -> None:
+        """
+        :param graph: the graph to preprocess, a WeightedGraph or weighted CSRGraph. Later changes to it are not seen.
+        :param witness_limit: vertices a witness search may settle before giving up and adding the shortcut. Lower is
+        faster to build but adds shortcuts that are not needed.
+        """
+        self._graph = graph
+        self._witness_limit = witness_limit
+        n: int = graph.vertex_count
+        self._rank: array = array("i", [0]) * n
+        self._middle: Dict[Pair, int] = {}  # the vertex each shortcut bypasses
+        self._weight: Dict[Pair, float] = {}  # final weight of every edge and shortcut
+        self._shortcuts: int = 0
+        # the remaining graph while contracting, keeping only the cheapest of any parallel edges
+        self._adjacency: List[Dict[int, float]] = [{} for _ in range(n)]
+        for u in range(n):
+            for v, weight in graph.iter_neighbor_indices_with_weights(u):
+                if v != u and weight < self._adjacency[u].get(v, _INFINITY):
+                    self._adjacency[u][v] = weight
+        up: List[List[Tuple[int, float]]] = self._contract_all()
+        # the upward graph, stored as CSR arrays
+        self._offsets: array = array("q", [0])
+        self._targets: array = array("i")
+        self._weights: array = array("d")
+        for edges in up:
+            for v, weight in edges:
+                self._targets.append(v)
+                self._weights.append(weight)
+            self._offsets.append(len(self._targets))
+        del self._adjacency
+
+    @property
+    def shortcut_count(self) -> int:
+        return self._shortcuts
+
+    # position of the vertex in the contraction order, higher is more important
+    def rank(self, vertex: V) -> int:
+        return self._rank[self._graph.index_of(vertex)]
+
+    # shortest distances from u to the targets (within limit) that avoid the vertex being contracted. Targets the
+    # search gives up on may be missing or hold an upper bound, which only costs an unneeded shortcut
+    def _witnesses(self, u: int, skip: int, targets: Set[int], limit: float, settle_limit: int) -> Dict[int, float]:
+        adjacency: List[Dict[int, float]] = self._adjacency
+        distances: Dict[int, float] = {u: 0.0}
+        heap: List[Tuple[float, int]] = [(0.0, u)]
+        remaining: int = len(targets)
+        settled: int = 0
+        while heap and settled < settle_limit:
+            d, x = heappop(heap)
+            if d > distances[x]:
+                continue
+            if d > limit:
+                break
+            if x in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            settled += 1
+            for y, weight in adjacency[x].items():
+                if y != skip and d + weight < distances.get(y, _INFINITY):
+                    distances[y] = d + weight
+                    heappush(heap, (d + weight, y))
+        return distances
+
+    # the shortcuts contracting v would need, as (u, w, weight)
+    def _needed_shortcuts(self, v: int, settle_limit: int) -> List[Tuple[int, int, float]]:
+        neighbors: List[Tuple[int, float]] = list(self._adjacency[v].items())
+        farthest: float = max((weight for _, weight in neighbors), default=0.0)
+        shortcuts: List[Tuple[int, int, float]] = []
+        for i, (u, to_u) in enumerate(neighbors[:-1]):
+            targets: Set[int] = {w for w, _ in neighbors[i + 1:]}
+            witnesses: Dict[int, float] = self._witnesses(u, v, targets, to_u + farthest, settle_limit)
+            for w, to_w in neighbors[i + 1:]:
+                if witnesses.get(w, _INFINITY) > to_u + to_w:
+                    shortcuts.append((u, w, to_u + to_w))
+        return shortcuts
+
+    # edge difference, plus how many neighbors are already gone and how deep in the hierarchy v already sits, both of
+    # which spread contraction evenly over the graph and keep queries shallow. The estimate uses a cheaper witness
+    # search than the contraction itself
+    def _priority(self, v: int, contracted_neighbors: array, levels: array) -> int:
+        shortcuts: int = len(self._needed_shortcuts(v, max(1, self._witness_limit // 10)))
+        return 2 * (shortcuts - len(self._adjacency[v])) + contracted_neighbors[v] + levels[v]
+
+    def _contract_all(self) -> List[List[Tuple[int, float]]]:
+        n: int = self._graph.vertex_count
+        adjacency: List[Dict[int, float]] = self._adjacency
+        contracted_neighbors: array = array("i", [0]) * n
+        levels: array = array("i", [0]) * n
+        up: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        heap: List[Tuple[int, int]] = [(self._priority(v, contracted_neighbors, levels), v) for v in range(n)]
+        heap.sort()
+        order: int = 0
+        while heap:
+            _, v = heappop(heap)
+            # lazy update: priorities only go stale upwards, so re-check and requeue if v is no longer the minimum
+            priority: int = self._priority(v, contracted_neighbors, levels)
+            if heap and priority > heap[0][0]:
+                heappush(heap, (priority, v))
+                continue
+            for u, w, weight in self._needed_shortcuts(v, self._witness_limit):
+                if weight < adjacency[u].get(w, _INFINITY):
+                    adjacency[u][w] = adjacency[w][u] = weight
+                    self._middle[_pair(u, w)] = v
+                    self._shortcuts += 1
+            for u, weight in adjacency[v].items():
+                up[v].append((u, weight))
+                self._weight[_pair(u, v)] = weight
+                del adjacency[u][v]
+                contracted_neighbors[u] += 1
+                levels[u] = max(levels[u], levels[v] + 1)
+            adjacency[v] = {}
+            self._rank[v] = order
+            order += 1
+        return up
+
+    # dijkstra over upward edges from one end of a query. other holds the distances the opposite search found; once
+    # the nearest vertex left is no closer than the best meeting point through them, the search stops
+    def _upward(self, source: int, other: Dict[int, float]) -> Tuple[Dict[int, float], Dict[int, int], float, int]:
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        distances: Dict[int, float] = {source: 0.0}
+        parents: Dict[int, int] = {}
+        best: float = _INFINITY
+        meet: int = -1
+        heap: List[Tuple[float, int]] = [(0.0, source)]
+        while heap:
+            d, u = heappop(heap)
+            if d > distances[u]:
+                continue
+            if d >= best:
+                break
+            if u in other and d + other[u] < best:
+                best, meet = d + other[u], u
+            edges: range = range(offsets[u], offsets[u + 1])
+            # stall on demand: a higher neighbor already reached more cheaply than u means u is not on a shortest
+            # path from this end, so there is no point searching on from it
+            if any(distances.get(targets[e], _INFINITY) + weights[e] < d for e in edges):
+                continue
+            for e in edges:
+                v: int = targets[e]
+                candidate: float = d + weights[e]
+                if candidate < distances.get(v, _INFINITY):
+                    distances[v] = candidate
+                    parents[v] = u
+                    heappush(heap, (candidate, v))
+        return distances, parents, best, meet
+
+    # search up from s, then up from t meeting it, returning the distance, the top vertex and each side's parents
+    def _query(self, s: int, t: int) -> Tuple[float, int, Dict[int, int], Dict[int, int]]:
+        forward, forward_parents, _, _ = self._upward(s, {})
+        _, backward_parents, best, meet = self._upward(t, forward)
+        return best, meet, forward_parents, backward_parents
+
+    def distance(self, first: V, second: V) -> Optional[float]:
+        best, _, _, _ = self._query(self._graph.index_of(first), self._graph.index_of(second))
+        return None if best == _INFINITY else best
+
+    def path(self, first: V, second: V) -> Optional[WeightedPath]:
+        s: int = self._graph.index_of(first)
+        t: int = self._graph.index_of(second)
+        best, meet, forward_parents, backward_parents = self._query(s, t)
+        if best == _INFINITY:
+            return None
+        route: List[int] = [meet]
+        while route[-1] != s:
+            route.append(forward_parents[route[-1]])
+        route.reverse()
+        while route[-1] != t:
+            route.append(backward_parents[route[-1]])
+        path: WeightedPath = []
+        for u, v in zip(route, route[1:]):
+            path.extend(self._unpack(u, v))
+        return path
+
+    # expand a (possibly shortcut) edge into the original edges from u to v
+    def _unpack(self, u: int, v: int) -> List[WeightedEdge]:
+        edges: List[WeightedEdge] = []
+        stack: List[Tuple[int, int]] = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle: Optional[int] = self._middle.get(_pair(a, b))
+            if middle is None:
+                edges.append(WeightedEdge(a, b, self._weight[_pair(a, b)]))
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))  # popped first, so the path stays in order
+        return edges
+
+
+if __name__ == "__main__":
+    city_graph: WeightedGraph[str] = WeightedGraph.from_edges([
+        ("Seattle", "Chicago", 1737), ("Seattle", "San Francisco", 678), ("San Francisco", "Riverside", 386),
+        ("San Francisco", "Los Angeles", 348), ("Los Angeles", "Riverside", 50), ("Los Angeles", "Phoenix", 357),
+        ("Riverside", "Phoenix", 307), ("Riverside", "Chicago", 1704), ("Phoenix", "Dallas", 887),
+        ("Phoenix", "Houston", 1015), ("Dallas", "Chicago", 805), ("Dallas", "Atlanta", 721),
+        ("Dallas", "Houston", 225), ("Houston", "Atlanta", 702), ("Houston", "Miami", 968),
+        ("Atlanta", "Chicago", 588), ("Atlanta", "Washington", 543), ("Atlanta", "Houston", 604),
+        ("Miami", "Washington", 923), ("Chicago", "Detroit", 238), ("Detroit", "Boston", 613),
+        ("Detroit", "Washington", 396), ("Detroit", "New York", 482), ("Boston", "New York", 190),
+        ("New York", "Philadelphia", 81), ("Philadelphia", "Washington", 123)])
+
+    hierarchy: ContractionHierarchy[str] = ContractionHierarchy(city_graph)
+    print(f"Contracted with {hierarchy.shortcut_count} shortcuts")
+    print("Shortest path from Los Angeles to Boston:")
+    print_weighted_path(city_graph, hierarchy.path("Los Angeles", "Boston"))
@@ -1,20 +1,11 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple, Dict
-from dataclasses import dataclass
+from array import array
+from typing import List, Optional, Tuple, Dict, Iterator, Mapping, Set
 from utils.weighted_graph import WeightedEdge, WeightedGraph, print_weighted_path, V, WeightedPath
-from utils.generic_search import PriorityQueue
+from utils.generic_search import KeyedPriorityQueue
+from utils.path_cache import PathCache
 
-
-@dataclass
-class DijkstraNode:
-    vertex: int
-    distance: float
-
-    def __lt__(self, other: DijkstraNode) -> bool:
-        return self.distance < other.distance
-
-    def __eq__(self, other: DijkstraNode) -> bool:
-        return self.distance == other.distance
+UNREACHABLE: float = float("inf")  # the distance to an unreachable vertex, where distances are kept in float arrays
 
 
 def dijkstra(wg: WeightedGraph[V], root: V) -> Tuple[List[Optional[float]], Dict[int, WeightedEdge]]:
@@ -22,11 +13,15 @@ def dijkstra(wg: WeightedGraph[V], root: V) -> Tuple[List[Optional[float]], Dict
     distances: List[Optional[float]] = [None] * wg.vertex_count  # since distances are unknown, populate with none
     distances[first] = 0  # the root is always 0 away from the root
     paths: Dict[int, WeightedEdge] = {}  # this dict will stores the path we took to each vertex
-    queue: PriorityQueue[DijkstraNode] = PriorityQueue()
-    queue.push(DijkstraNode(first, 0))  # add the starting node into the priority queue
+    settled: bytearray = bytearray(wg.vertex_count)  # vertices whose shortest distance is final
+    queue: KeyedPriorityQueue[int] = KeyedPriorityQueue()  # vertex indices keyed by distance
+    queue.push(first, 0)  # add the starting vertex into the priority queue
 
     while not queue.empty:
-        vertex: int = queue.pop().vertex  # explore the next closest vertex
+        vertex: int = queue.pop()  # explore the next closest vertex
+        if settled[vertex]:
+            continue  # a stale entry, the vertex was already reached more cheaply
+        settled[vertex] = 1
         dist_u: float = distances[vertex]
         # check each edge/vertex from the vertex in question
         for we in wg.edges_for_index(vertex):
@@ -42,11 +37,95 @@ def dijkstra(wg: WeightedGraph[V], root: V) -> Tuple[List[Optional[float]], Dict
                 distances[we.v] = curr_dist
                 paths[we.v] = we
                 # push to priority queue to explore
-                queue.push(DijkstraNode(we.v, curr_dist))
+                queue.push(we.v, curr_dist)
 
     return distances, paths
 
 
+class PredecessorMap(Mapping[int, WeightedEdge]):
+    """
+    Read-only view of a shortest path tree stored as two flat arrays: the predecessor of each vertex (-1 for none) and
+    the weight of the edge from it. It behaves like the Dict[int, WeightedEdge] dijkstra returns, so dict_to_path can
+    walk it, but costs 16 bytes per vertex and builds edges only when they are looked up.
+    """
+
+    def __init__(self, predecessors: array, weights: array, count: int) -> None:
+        """
+        :param predecessors: the predecessor of each vertex, -1 for none.
+        :param weights: the weight of the edge from each vertex's predecessor.
+        :param count: how many vertices have a predecessor, counted by the search so the arrays are never scanned.
+        """
+        self._predecessors = predecessors
+        self._weights = weights
+        self._count = count
+
+    def __getitem__(self, vertex: int) -> WeightedEdge:
+        u: int = self._predecessors[vertex]
+        if u < 0:
+            raise KeyError(vertex)
+        return WeightedEdge(u, vertex, self._weights[vertex])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        return (v for v, u in enumerate(self._predecessors) if u >= 0)
+
+    @property
+    def predecessors(self) -> array:
+        return self._predecessors
+
+
+def dijkstra_to(wg: WeightedGraph[V], root: V, *targets: V) -> Tuple[List[Optional[float]], PredecessorMap]:
+    """
+    Dijkstra that stops as soon as every target has been settled, for point to point queries.
+    :param wg: the graph, a WeightedGraph or a weighted CSRGraph.
+    :param root: the vertex to search from.
+    :param targets: the vertices we need distances to. With none the whole tree is computed, as in dijkstra.
+    :return: distances and the predecessor map. Distances are final for the targets and every vertex settled before
+    them; other reached vertices hold an upper bound, unreached ones None.
+    """
+    first: int = wg.index_of(root)
+    distances: List[Optional[float]] = [None] * wg.vertex_count
+    distances[first] = 0
+    predecessors: array = array("q", [-1]) * wg.vertex_count
+    weights: array = array("d", [0.0]) * wg.vertex_count
+    settled: bytearray = bytearray(wg.vertex_count)
+    # a target in another component would never be settled and would make us exhaust the root's component. Drop the
+    # ones the graph already knows to be unreachable, but never build its union-find just for this: after a removal
+    # that costs a pass over the whole graph, while a nearby target is settled long before
+    remaining: Set[int] = {wg.index_of(target) for target in targets
+                           if wg.connected_if_known(root, target) is not False}
+    if targets and not remaining:
+        return distances, PredecessorMap(predecessors, weights, 0)
+    reached: int = 0  # vertices given a predecessor, the length of the map
+    queue: KeyedPriorityQueue[int] = KeyedPriorityQueue()
+    queue.push(first, 0)
+
+    while not queue.empty:
+        u: int = queue.pop()
+        if settled[u]:
+            continue  # lazy deletion: u was pushed again with a shorter distance and has been handled
+        settled[u] = 1
+        if remaining:
+            remaining.discard(u)
+            if not remaining:
+                break  # every target is settled, the rest of the graph does not matter
+        dist_u: float = distances[u]
+        for v, weight in wg.iter_neighbor_indices_with_weights(u):
+            dist_v: Optional[float] = distances[v]
+            candidate: float = dist_u + weight
+            if dist_v is None or dist_v > candidate:
+                if dist_v is None:
+                    reached += 1
+                distances[v] = candidate
+                predecessors[v] = u
+                weights[v] = weight
+                queue.push(v, candidate)
+
+    return distances, PredecessorMap(predecessors, weights, reached)
+
+
 # helper function to access Dijkstra's results
 def distance_array_to_vertex_dict(wg: WeightedGraph[V], distances: List[Optional[float]]) -> Dict[V, Optional[float]]:
     distance_dict: Dict[V, Optional[float]] = {}
@@ -55,8 +134,9 @@ def distance_array_to_vertex_dict(wg: WeightedGraph[V], distances: List[Optional
     return distance_dict
 
 
-# takes a dictionary of edges to reach each vertex and returns a list of edges that goes from start to return
-def dict_to_path(start: int, end: int, path_dict: Dict[int, WeightedEdge]) -> WeightedPath:
+# takes a dictionary of edges to reach each vertex (or a PredecessorMap) and returns a list of edges that goes from
+# start to return
+def dict_to_path(start: int, end: int, path_dict: Mapping[int, WeightedEdge]) -> WeightedPath:
     if len(path_dict) == 0:
         return []
 
@@ -71,6 +151,18 @@ def dict_to_path(start: int, end: int, path_dict: Dict[int, WeightedEdge]) -> We
     return list(reversed(edge_path))
 
 
+# shortest weighted path from start to goal, served from a cached dijkstra tree rooted at start when there is one
+def cached_dijkstra_path(cache: PathCache[V], start: V, goal: V) -> Optional[WeightedPath]:
+    wg: WeightedGraph[V] = cache.graph
+    distances, paths = cache.tree("dijkstra", start, lambda: dijkstra(wg, start))
+    end: int = wg.index_of(goal)
+    if distances[end] is None:
+        return None
+    if goal == start:
+        return []
+    return dict_to_path(wg.index_of(start), end, paths)
+
+
 if __name__ == "__main__":
     city_graph: WeightedGraph[str] = WeightedGraph(
         ["Seattle", "San Francisco", "Los Angeles", "Riverside", "Phoenix", "Chicago",
@@ -0,0 +1,199 @@
+from __future__ import annotations
+from heapq import heappop, heappush
+from typing import Callable, Dict, Generic, List, Mapping, Optional, Set, Tuple
+from utils.graph import ChangeKind, GraphChange
+from utils.weighted_graph import WeightedEdge, WeightedGraph, WeightedPath, V, print_weighted_path
+from challenges.djikstra import UNREACHABLE, dijkstra, dict_to_path
+
+"""
+DYNAMIC SHORTEST PATHS
+A single source shortest path tree that stays correct while its WeightedGraph changes, instead of running dijkstra
+again from the root after every edit. It subscribes to the graph's changes and repairs only what an edit can affect:
+
+* a cheaper or new edge can only shorten paths. Both ends are relaxed through it and, if either improves, a dijkstra
+  seeded with just that vertex spreads the improvement, touching only vertices whose distance drops.
+* a dearer or removed edge only matters if it is in the tree. Then the subtree hanging below it loses its distances,
+  each vertex in it takes the best offer from a neighbor outside the subtree, and a dijkstra within the subtree settles
+  the rest. Vertices that can no longer be reached end up unreachable.
+
+Either way the work is proportional to the vertices repaired (and their edges), not to the size of the graph. Removing
+a vertex moves the last vertex into its index, as in the graph, after its edges have been removed one at a time.
+"""
+
+_NO_PARENT: int = -1
+
+
+class DynamicShortestPaths(Generic[V]):
+    def __init__(self, graph: WeightedGraph[V], root: V, distances: Optional[List[Optional[float]]] = None,
+                 paths: Optional[Mapping[int, WeightedEdge]] = None) -> None:
+        """
+        :param graph: the graph, followed through its change notifications until close is called.
+        :param root: the source of every path.
+        :param distances: dijkstra's (or a full dijkstra_to's) distances from root, computed here if not given.
+        :param paths: the matching tree of edges to each vertex.
+        """
+        if distances is None or paths is None:
+            distances, paths = dijkstra(graph, root)
+        self._graph = graph
+        self._root: int = graph.index_of(root)
+        self._distances: List[float] = [UNREACHABLE if d is None else d for d in distances]
+        self._parents: List[int] = [_NO_PARENT] * graph.vertex_count
+        self._weights: List[float] = [0.0] * graph.vertex_count  # weight of the tree edge from each parent
+        self._children: List[Set[int]] = [set() for _ in range(graph.vertex_count)]
+        for v in paths:
+            edge: WeightedEdge = paths[v]
+            self._attach(v, edge.u, edge.weight)
+        self._unsubscribe: Callable[[], None] = graph.subscribe(self._on_change)
+
+    # stop following the graph, the tree keeps the distances it had
+    def close(self) -> None:
+        self._unsubscribe()
+
+    @property
+    def root(self) -> Optional[V]:
+        return None if self._root == _NO_PARENT else self._graph.vertex_at(self._root)
+
+    # the same form dijkstra returns
+    @property
+    def distances(self) -> List[Optional[float]]:
+        return [None if d == UNREACHABLE else d for d in self._distances]
+
+    def distance(self, vertex: V) -> Optional[float]:
+        d: float = self._distances[self._graph.index_of(vertex)]
+        return None if d == UNREACHABLE else d
+
+    # the edge used to reach each reachable vertex, as dijkstra returns it
+    @property
+    def paths(self) -> Dict[int, WeightedEdge]:
+        return {v: WeightedEdge(u, v, self._weights[v]) for v, u in enumerate(self._parents) if u != _NO_PARENT}
+
+    def path_to(self, vertex: V) -> Optional[WeightedPath]:
+        end: int = self._graph.index_of(vertex)
+        if self._distances[end] == UNREACHABLE:
+            return None
+        if end == self._root:
+            return []
+        return dict_to_path(self._root, end, self.paths)
+
+    def _attach(self, v: int, parent: int, weight: float) -> None:
+        self._detach(v)
+        self._parents[v] = parent
+        self._weights[v] = weight
+        self._children[parent].add(v)
+
+    def _detach(self, v: int) -> None:
+        if self._parents[v] != _NO_PARENT:
+            self._children[self._parents[v]].discard(v)
+            self._parents[v] = _NO_PARENT
+
+    def _on_change(self, change: GraphChange) -> None:
+        if change.kind is ChangeKind.ADD_VERTEX:
+            self._distances.append(UNREACHABLE)
+            self._parents.append(_NO_PARENT)
+            self._weights.append(0.0)
+            self._children.append(set())
+        elif change.kind is ChangeKind.REMOVE_VERTEX:
+            self._remove_vertex(change.u, change.v)
+        elif change.u == change.v:
+            return  # a loop is never on a shortest path
+        elif change.kind is ChangeKind.ADD_EDGE:
+            self._cheaper(change.u, change.v, change.weight)
+        elif change.kind is ChangeKind.REMOVE_EDGE:
+            self._dearer(change.u, change.v, change.weight)
+        elif change.weight < change.previous:
+            self._cheaper(change.u, change.v, change.weight)
+        elif change.weight > change.previous:
+            self._dearer(change.u, change.v, change.previous)
+
+    # an edge of this weight between u and v appeared or got cheaper
+    def _cheaper(self, u: int, v: int, weight: float) -> None:
+        heap: List[Tuple[float, int]] = []
+        for a, b in ((u, v), (v, u)):
+            if self._distances[a] + weight < self._distances[b]:
+                self._distances[b] = self._distances[a] + weight
+                self._attach(b, a, weight)
+                heappush(heap, (self._distances[b], b))
+        self._settle(heap)
+
+    # an edge that weighed weight between u and v is gone or got dearer. If the tree used it, whichever end hung below
+    # it needs new paths for its whole subtree
+    def _dearer(self, u: int, v: int, weight: float) -> None:
+        for parent, child in ((u, v), (v, u)):
+            if self._parents[child] == parent and self._weights[child] == weight:
+                self._repair(child)
+                return
+
+    def _repair(self, top: int) -> None:
+        subtree: List[int] = [top]
+        for x in subtree:  # grows as it goes, collecting every descendant
+            subtree.extend(self._children[x])
+        affected: Set[int] = set(subtree)
+        for x in subtree:
+            self._distances[x] = UNREACHABLE
+            self._detach(x)
+        # the best way into the subtree from every vertex whose distance still stands
+        heap: List[Tuple[float, int]] = []
+        for x in subtree:
+            for y, weight in self._graph.iter_neighbor_indices_with_weights(x):
+                if y not in affected and self._distances[y] + weight < self._distances[x]:
+                    self._distances[x] = self._distances[y] + weight
+                    self._attach(x, y, weight)
+            if self._distances[x] != UNREACHABLE:
+                heappush(heap, (self._distances[x], x))
+        self._settle(heap)
+
+    # dijkstra from the vertices in heap, whose distances have just dropped. Only vertices that improve are pushed
+    def _settle(self, heap: List[Tuple[float, int]]) -> None:
+        distances: List[float] = self._distances
+        while heap:
+            d, x = heappop(heap)
+            if d > distances[x]:
+                continue  # a stale entry
+            for y, weight in self._graph.iter_neighbor_indices_with_weights(x):
+                if d + weight < distances[y]:
+                    distances[y] = d + weight
+                    self._attach(y, x, weight)
+                    heappush(heap, (d + weight, y))
+
+    # the vertex at index is gone (its edges already removed) and the last vertex has taken over its index
+    def _remove_vertex(self, index: int, last: int) -> None:
+        if index == self._root:
+            self._root = _NO_PARENT
+        elif last == self._root:
+            self._root = index
+        self._detach(index)
+        if index != last:
+            parent: int = self._parents[last]
+            self._detach(last)
+            self._distances[index] = self._distances[last]
+            self._weights[index] = self._weights[last]
+            self._children[index] = self._children[last]
+            for child in self._children[index]:
+                self._parents[child] = index
+            if parent != _NO_PARENT:
+                self._attach(index, parent, self._weights[index])
+        self._distances.pop()
+        self._parents.pop()
+        self._weights.pop()
+        self._children.pop()
+
+
+if __name__ == "__main__":
+    city_graph: WeightedGraph[str] = WeightedGraph.from_edges([
+        ("Seattle", "Chicago", 1737), ("Seattle", "San Francisco", 678), ("San Francisco", "Riverside", 386),
+        ("San Francisco", "Los Angeles", 348), ("Los Angeles", "Riverside", 50), ("Los Angeles", "Phoenix", 357),
+        ("Riverside", "Phoenix", 307), ("Riverside", "Chicago", 1704), ("Phoenix", "Dallas", 887),
+        ("Phoenix", "Houston", 1015), ("Dallas", "Chicago", 805), ("Dallas", "Atlanta", 721),
+        ("Dallas", "Houston", 225), ("Houston", "Atlanta", 702), ("Houston", "Miami", 968),
+        ("Atlanta", "Chicago", 588), ("Atlanta", "Washington", 543), ("Atlanta", "Houston", 604),
+        ("Miami", "Washington", 923), ("Chicago", "Detroit", 238), ("Detroit", "Boston", 613),
+        ("Detroit", "Washington", 396), ("Detroit", "New York", 482), ("Boston", "New York", 190),
+        ("New York", "Philadelphia", 81), ("Philadelphia", "Washington", 123)])
+
+    tree: DynamicShortestPaths[str] = DynamicShortestPaths(city_graph, "Los Angeles")
+    print("Shortest path from Los Angeles to Boston:")
+    print_weighted_path(city_graph, tree.path_to("Boston"))
+    print("")
+    print("After closing Chicago to Detroit:")
+    city_graph.remove_edge_by_vertices("Chicago", "Detroit")
+    print_weighted_path(city_graph, tree.path_to("Boston"))
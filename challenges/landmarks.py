@@ -0,0 +1,206 @@
+from __future__ import annotations
+import random
+import struct
+from array import array
+from typing import Callable, Generic, List, Optional, Tuple
+from utils.csr_graph import AnyWeightedGraph
+from utils.generic_search import astar, node_to_path, Node
+from utils.instrumentation import SearchStats
+from utils.weighted_graph import WeightedGraph, V
+from challenges.djikstra import UNREACHABLE, dijkstra_to
+
+"""
+ALT LANDMARK HEURISTICS
+A* with landmarks and the triangle inequality. For a handful of landmark vertices L the exact distance d(L, v) to every
+vertex is precomputed. Since d(L, goal) <= d(L, v) + d(v, goal) (and the same the other way round, the graph being
+undirected), |d(L, v) - d(L, goal)| never overestimates d(v, goal), and the largest of these over all landmarks is an
+admissible heuristic for astar on graphs that have no geometry to offer one.
+
+Landmarks work best at the edges of the graph, behind the vertices being searched. "farthest" keeps picking the vertex
+farthest from the landmarks chosen so far. "avoid" grows a shortest path tree from a random root and walks down into the
+subtree whose distances the current landmarks bound worst, which tends to cover the graph more evenly. Either way a
+component no landmark reaches gets one first, and selection stops early once another landmark would add nothing.
+
+The table is a flat array of distances (k rows of n) that can be saved to a file and loaded back without running
+dijkstra again.
+"""
+
+_HEADER: struct.Struct = struct.Struct("<4sQQ")  # magic, landmark count, vertex count
+_MAGIC: bytes = b"ALT1"
+
+
+class LandmarkTable(Generic[V]):
+    def __init__(self, graph: AnyWeightedGraph, landmarks: array, distances: array) -> None:
+        """
+        :param graph: the graph the distances were computed on.
+        :param landmarks: index of each landmark.
+        :param distances: len(landmarks) rows of vertex_count distances, inf where unreachable.
+        """
+        n: int = graph.vertex_count
+        if len(distances) != len(landmarks) * n:
+            raise ValueError("The distance table does not match the graph and landmarks.")
+        self._graph = graph
+        self._landmarks = landmarks
+        self._distances = distances
+        view: memoryview = memoryview(distances)
+        self._rows: List[memoryview] = [view[i * n:(i + 1) * n] for i in range(len(landmarks))]
+
+    @classmethod
+    def build(cls, graph: AnyWeightedGraph, count: int, strategy: str = "avoid", seed: int = 0) -> LandmarkTable[V]:
+        """
+        :param graph: a WeightedGraph or weighted CSRGraph.
+        :param count: number of landmarks, 8 to 16 is typical.
+        :param strategy: "farthest" or "avoid".
+        :param seed: seeds the random start vertices.
+        :return: the table
+        """
+        if strategy not in ("farthest", "avoid"):
+            raise ValueError(f"Unknown landmark strategy {strategy}.")
+        rng: random.Random = random.Random(seed)
+        n: int = graph.vertex_count
+        table: LandmarkTable[V] = cls(graph, array("q"), array("d"))
+        for _ in range(min(count, n)):
+            start: int = rng.randrange(n)
+            uncovered: Optional[int] = table._uncovered()
+            landmark: Optional[int]
+            if uncovered is not None:
+                # a component no landmark reaches yet comes first, the very first landmark is found from a random start
+                first: bool = not table._rows and not table._isolated(start)
+                landmark = table._farthest_from(start if first else uncovered)
+            elif strategy == "farthest":
+                landmark = table._farthest()
+            else:
+                landmark = table._avoid(start)
+            if landmark is None:
+                break  # every vertex is a landmark or sits on one, more would add nothing
+            table = table._with_landmark(landmark)
+        return table
+
+    @classmethod
+    def load(cls, graph: AnyWeightedGraph, path: str) -> LandmarkTable[V]:
+        with open(path, "rb") as file:
+            magic, count, n = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != _MAGIC or n != graph.vertex_count:
+                raise ValueError(f"{path} is not a landmark table for this graph.")
+            landmarks: array = array("q")
+            landmarks.fromfile(file, count)
+            distances: array = array("d")
+            distances.fromfile(file, count * n)
+        return cls(graph, landmarks, distances)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, len(self._landmarks), self._graph.vertex_count))
+            self._landmarks.tofile(file)
+            self._distances.tofile(file)
+
+    @property
+    def landmarks(self) -> List[V]:
+        return [self._graph.vertex_at(index) for index in self._landmarks]
+
+    # a new table with one more landmark, one dijkstra from it fills in its row
+    def _with_landmark(self, landmark: int) -> LandmarkTable[V]:
+        distances, _ = dijkstra_to(self._graph, self._graph.vertex_at(landmark))
+        row: array = array("d", (UNREACHABLE if d is None else d for d in distances))
+        return LandmarkTable(self._graph, self._landmarks + array("q", [landmark]), self._distances + row)
+
+    # a vertex with no edges has nothing to search, and a landmark on it would help no query
+    def _isolated(self, vertex: int) -> bool:
+        return next(iter(self._graph.iter_neighbor_indices(vertex)), None) is None
+
+    # a vertex with edges that no landmark reaches, if any
+    def _uncovered(self) -> Optional[int]:
+        return next((v for v in range(self._graph.vertex_count)
+                     if all(row[v] == UNREACHABLE for row in self._rows) and not self._isolated(v)), None)
+
+    # the vertex farthest from start, in start's component
+    def _farthest_from(self, start: int) -> int:
+        distances, _ = dijkstra_to(self._graph, self._graph.vertex_at(start))
+        return max((d, v) for v, d in enumerate(distances) if d is not None)[1]
+
+    # the vertex farthest from its nearest landmark, once every component with edges has one. None when every such
+    # vertex is a landmark or at distance 0 from one
+    def _farthest(self) -> Optional[int]:
+        nearest: List[float] = [min((row[v] for row in self._rows), default=UNREACHABLE)
+                                for v in range(self._graph.vertex_count)]
+        distance, vertex = max(((d, v) for v, d in enumerate(nearest) if d != UNREACHABLE), default=(0.0, -1))
+        return vertex if distance > 0 else None
+
+    # Goldberg and Werneck's avoid: in a shortest path tree from root, weigh every vertex by how much its distance
+    # exceeds what the landmarks can bound, sum the weights of subtrees holding no landmark, then walk down from the
+    # root into the heaviest child until reaching a leaf
+    def _avoid(self, root: int) -> Optional[int]:
+        n: int = self._graph.vertex_count
+        distances, tree = dijkstra_to(self._graph, self._graph.vertex_at(root))
+        parents: array = tree.predecessors
+        reached: List[int] = sorted((v for v in range(n) if distances[v] is not None), key=lambda v: distances[v])
+        size: List[float] = [0.0] * n
+        for v in reached:
+            size[v] = distances[v] - self._lower_bound(root, v)
+        for landmark in self._landmarks:
+            size[landmark] = -UNREACHABLE  # poisons every subtree holding a landmark
+        for v in reversed(reached):  # children are settled after their parents
+            if parents[v] >= 0:
+                size[parents[v]] += size[v]
+        heaviest: List[int] = [-1] * n
+        for v in reached:
+            u: int = parents[v]
+            if u >= 0 and size[v] > 0 and (heaviest[u] < 0 or size[v] > size[heaviest[u]]):
+                heaviest[u] = v
+        vertex: int = root
+        while heaviest[vertex] >= 0:
+            vertex = heaviest[vertex]
+        return vertex if vertex != root else self._farthest()  # every subtree is covered, fall back to farthest
+
+    # the best lower bound the landmarks give on the distance between the vertices at u and v
+    def _lower_bound(self, u: int, v: int) -> float:
+        best: float = 0.0
+        for row in self._rows:
+            du: float = row[u]
+            dv: float = row[v]
+            if du != UNREACHABLE and dv != UNREACHABLE and abs(du - dv) > best:
+                best = abs(du - dv)
+        return best
+
+    def lower_bound(self, first: V, second: V) -> float:
+        return self._lower_bound(self._graph.index_of(first), self._graph.index_of(second))
+
+    # an admissible heuristic towards goal for astar
+    def heuristic(self, goal: V) -> Callable[[V], float]:
+        target: int = self._graph.index_of(goal)
+        # only landmarks that reach the goal can say anything about it
+        columns: List[Tuple[memoryview, float]] = [(row, row[target]) for row in self._rows
+                                                   if row[target] != UNREACHABLE]
+        index_of: Callable[[V], int] = self._graph.index_of
+
+        def estimate(vertex: V) -> float:
+            v: int = index_of(vertex)
+            best: float = 0.0
+            for row, to_goal in columns:
+                bound: float = abs(row[v] - to_goal)
+                if bound > best:
+                    best = bound  # an unreachable vertex gets inf, which is exact
+            return best
+
+        return estimate
+
+
+if __name__ == "__main__":
+    city_graph: WeightedGraph[str] = WeightedGraph.from_edges([
+        ("Seattle", "Chicago", 1737), ("Seattle", "San Francisco", 678), ("San Francisco", "Riverside", 386),
+        ("San Francisco", "Los Angeles", 348), ("Los Angeles", "Riverside", 50), ("Los Angeles", "Phoenix", 357),
+        ("Riverside", "Phoenix", 307), ("Riverside", "Chicago", 1704), ("Phoenix", "Dallas", 887),
+        ("Phoenix", "Houston", 1015), ("Dallas", "Chicago", 805), ("Dallas", "Atlanta", 721),
+        ("Dallas", "Houston", 225), ("Houston", "Atlanta", 702), ("Houston", "Miami", 968),
+        ("Atlanta", "Chicago", 588), ("Atlanta", "Washington", 543), ("Atlanta", "Houston", 604),
+        ("Miami", "Washington", 923), ("Chicago", "Detroit", 238), ("Detroit", "Boston", 613),
+        ("Detroit", "Washington", 396), ("Detroit", "New York", 482), ("Boston", "New York", 190),
+        ("New York", "Philadelphia", 81), ("Philadelphia", "Washington", 123)])
+
+    table: LandmarkTable[str] = LandmarkTable.build(city_graph, 3)
+    print(f"Landmarks: {table.landmarks}")
+    for name, heuristic in (("no heuristic", lambda _: 0.0), ("landmarks", table.heuristic("Boston"))):
+        stats: SearchStats = SearchStats()
+        result: Optional[Node[str]] = astar("Seattle", lambda city: city == "Boston", city_graph.neighbors_for_vertex,
+                                            heuristic, cost=city_graph.weight_between, stats=stats)
+        print(f"{name}: {node_to_path(result)} cost {result.cost}, {stats.nodes_expanded} expanded")
@@ -1,8 +1,8 @@
 import random
 from enum import Enum
 from math import sqrt
-from typing import NamedTuple, List, Callable
-from utils.generic_search import node_to_path, dfs, bfs, astar
+from typing import NamedTuple, List, Callable, Optional, Tuple, Dict
+from utils.generic_search import node_to_path, dfs, bfs, astar, GridEncoding, Node, KeyedPriorityQueue
 
 
 class Cell(str, Enum):
@@ -58,6 +58,11 @@ class Maze:
             output += "".join([c.value for c in row]) + "\n"
         return output
 
+    # row-major integer encoding of the grid, lets the searches opt into the compact array-backed engine
+    @property
+    def encoding(self) -> GridEncoding[MazeLocation]:
+        return GridEncoding(self._rows, self._columns, MazeLocation)
+
     # test whether we have reached our goal MazeLocation
     def goal_test(self, ml: MazeLocation):
         return ml == self.goal
@@ -80,6 +85,88 @@ class Maze:
 
         return locations
 
+    # whether a cell is inside the grid and not blocked
+    def _passable(self, row: int, col: int) -> bool:
+        return 0 <= row < self._rows and 0 <= col < self._columns and self._grid[row][col] != Cell.BLOCKED
+
+    # slide horizontally from (row, col) and return the first jump point, or None if we hit a wall. A cell is a jump
+    # point if it is the goal or has a forced neighbor: an open cell above/below whose counterpart behind us is blocked
+    def _jump_horizontal(self, row: int, col: int, dcol: int) -> Optional[MazeLocation]:
+        # this scan is the hot loop of the search, so the rows are read directly rather than through _passable
+        line: List[Cell] = self._grid[row]
+        above: Optional[List[Cell]] = self._grid[row - 1] if row > 0 else None
+        below: Optional[List[Cell]] = self._grid[row + 1] if row + 1 < self._rows else None
+        goal_col: int = self.goal.col if row == self.goal.row else -1
+        while True:
+            col += dcol
+            if col < 0 or col >= self._columns or line[col] is Cell.BLOCKED:
+                return None
+            if col == goal_col:
+                return MazeLocation(row, col)
+            if above is not None and above[col] is not Cell.BLOCKED and above[col - dcol] is Cell.BLOCKED:
+                return MazeLocation(row, col)
+            if below is not None and below[col] is not Cell.BLOCKED and below[col - dcol] is Cell.BLOCKED:
+                return MazeLocation(row, col)
+
+    # slide vertically. Vertical moves play the role diagonals do in 8-connected JPS: at every cell we also scan left
+    # and right, and stop here if either scan finds a jump point
+    def _jump_vertical(self, row: int, col: int, drow: int) -> Optional[MazeLocation]:
+        while True:
+            row += drow
+            if not self._passable(row, col):
+                return None
+            if row == self.goal.row and col == self.goal.col:
+                return MazeLocation(row, col)
+            if self._jump_horizontal(row, col, 1) is not None or self._jump_horizontal(row, col, -1) is not None:
+                return MazeLocation(row, col)
+
+    # directions worth exploring from a jump point we arrived at moving (drow, dcol). Everything else is reachable
+    # just as cheaply by a path that goes vertical first
+    def _pruned_directions(self, ml: MazeLocation, drow: int, dcol: int) -> List[Tuple[int, int]]:
+        if drow == 0 and dcol == 0:  # the start, nothing to prune
+            return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        if drow != 0:
+            return [(drow, 0), (0, 1), (0, -1)]
+        directions: List[Tuple[int, int]] = [(0, dcol)]
+        for d in (-1, 1):
+            if self._passable(ml.row + d, ml.col) and not self._passable(ml.row + d, ml.col - dcol):
+                directions.append((d, 0))
+        return directions
+
+    # Jump Point Search. A* over jump points only, reading the grid directly instead of building successor lists
+    def jump_point_search(self) -> Optional[List[MazeLocation]]:
+        """
+        :return: the full path from start to goal (same format as node_to_path gives for astar), or None.
+        """
+        heuristic: Callable[[MazeLocation], float] = manhattan_distance(self.goal)
+        frontier: KeyedPriorityQueue[Node[MazeLocation]] = KeyedPriorityQueue()
+        frontier.push(Node(self.start, None, 0.0, heuristic(self.start)), 0.0)
+        best: Dict[MazeLocation, float] = {self.start: 0.0}
+
+        while not frontier.empty:
+            node: Node[MazeLocation] = frontier.pop()
+            current: MazeLocation = node.state
+            if node.cost > best[current]:
+                continue  # stale entry
+            if current == self.goal:
+                return _expand_jumps(node_to_path(node))
+            drow, dcol = (0, 0) if node.parent is None else _direction(node.parent.state, current)
+            for direction in self._pruned_directions(current, drow, dcol):
+                if direction[0] == 0:
+                    jump_point = self._jump_horizontal(current.row, current.col, direction[1])
+                else:
+                    jump_point = self._jump_vertical(current.row, current.col, direction[0])
+                if jump_point is None:
+                    continue
+                # jump points are always in a straight line from where we jumped
+                new_cost: float = node.cost + abs(jump_point.row - current.row) + abs(jump_point.col - current.col)
+                if jump_point not in best or best[jump_point] > new_cost:
+                    best[jump_point] = new_cost
+                    jump_node: Node[MazeLocation] = Node(jump_point, node, new_cost, heuristic(jump_point))
+                    frontier.push(jump_node, jump_node.f, -new_cost)
+
+        return None
+
     # mark up the grid with * where there is a path to the goal
     def mark(self, path: List[MazeLocation]):
         for maze_location in path:
@@ -115,11 +202,26 @@ def manhattan_distance(goal: MazeLocation) -> Callable[[MazeLocation], float]:
     return distance
 
 
+# unit step from one location towards another on the same row or column
+def _direction(start: MazeLocation, end: MazeLocation) -> Tuple[int, int]:
+    return (end.row > start.row) - (end.row < start.row), (end.col > start.col) - (end.col < start.col)
+
+
+# fill in the cells between consecutive jump points
+def _expand_jumps(jump_points: List[MazeLocation]) -> List[MazeLocation]:
+    path: List[MazeLocation] = [jump_points[0]]
+    for end in jump_points[1:]:
+        drow, dcol = _direction(path[-1], end)
+        while path[-1] != end:
+            path.append(MazeLocation(path[-1].row + drow, path[-1].col + dcol))
+    return path
+
+
 if __name__ == "__main__":
     maze = Maze()
 
     dfs_solution = dfs(maze.start, maze.goal_test, maze.successors)
-    bfs_solution = bfs(maze.start, maze.goal_test, maze.successors)
+    bfs_solution = bfs(maze.start, maze.goal_test, maze.successors, encoding=maze.encoding)
 
     distance = manhattan_distance(maze.goal)  # manhattan distance for astar solution
     astar_solution = astar(maze.start, maze.goal_test, maze.successors, distance)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import List, Optional
-from utils.generic_search import bfs, Node, node_to_path
+from utils.generic_search import bfs, Node, node_to_path, StateEncoding
 
 """
 MISSIONARIES AND CANNIBALS
@@ -63,6 +63,21 @@ class MCState:
         return [x for x in children if x.is_legal]
 
 
+# packs (west missionaries, west cannibals, boat) into one int so bfs can run on the compact engine
+class MCEncoding(StateEncoding[MCState]):
+    @property
+    def size(self) -> int:
+        return (MAX_NUM + 1) * (MAX_NUM + 1) * 2
+
+    def encode(self, state: MCState) -> int:
+        return (state.wm * (MAX_NUM + 1) + state.wc) * 2 + int(state.boat)
+
+    def decode(self, code: int) -> MCState:
+        rest, boat = divmod(code, 2)
+        missionaries, cannibals = divmod(rest, MAX_NUM + 1)
+        return MCState(missionaries, cannibals, bool(boat))
+
+
 # display the solution to the problem
 def display_solution(path: List[MCState]) -> None:
     if len(path) == 0:
@@ -89,7 +104,7 @@ def display_solution(path: List[MCState]) -> None:
 
 if __name__ == "__main__":
     start: MCState = MCState(MAX_NUM, MAX_NUM, True)
-    solution: Optional[Node[MCState]] = bfs(start, MCState.goal_test, MCState.successors)
+    solution: Optional[Node[MCState]] = bfs(start, MCState.goal_test, MCState.successors, encoding=MCEncoding())
 
     if solution is None:
         print("No solution found.")
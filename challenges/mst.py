@@ -1,6 +1,6 @@
-from typing import TypeVar, List, Optional, Set
-from utils.generic_search import PriorityQueue
-from utils.weighted_graph import WeightedGraph, WeightedPath, V, print_weighted_path
+from typing import Optional, Set
+from utils.generic_search import KeyedPriorityQueue
+from utils.weighted_graph import WeightedGraph, WeightedEdge, WeightedPath, V, print_weighted_path
 
 
 def mst(wg: WeightedGraph[V], start: int = 0) -> Optional[WeightedPath]:
@@ -8,7 +8,7 @@ def mst(wg: WeightedGraph[V], start: int = 0) -> Optional[WeightedPath]:
         return None
 
     result: WeightedPath = []
-    queue: PriorityQueue = PriorityQueue()
+    queue: KeyedPriorityQueue[WeightedEdge] = KeyedPriorityQueue()  # edges keyed by weight
     visited: Set[int] = {start}  # mark the start as visited
 
     def visit(index: int):
@@ -16,7 +16,7 @@ def mst(wg: WeightedGraph[V], start: int = 0) -> Optional[WeightedPath]:
         for edge in wg.edges_for_index(index):
             # add all edges coming from here to the priority queue
             if edge.v not in visited:
-                queue.push(edge)
+                queue.push(edge, edge.weight)
 
     # visit the first vertex
     visit(start)
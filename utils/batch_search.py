@@ -0,0 +1,57 @@
+from multiprocessing import Pool, cpu_count
+from typing import List, Optional, Sequence, Tuple, Union
+from utils.csr_graph import CSRGraph
+from utils.generic_search import astar, bfs, node_to_path, Node
+from utils.graph import Graph, V
+from utils.weighted_graph import WeightedGraph
+
+"""
+BATCH PATH QUERIES
+Answers many (start, goal) queries against one static graph using a process pool. The graph is handed to each worker
+once when the pool starts (and with the fork start method it is simply inherited), so tasks only carry the two
+vertices of a query. Unweighted graphs are searched with bfs, weighted graphs with astar using edge weights as costs.
+"""
+
+Query = Tuple[V, V]
+
+_graph: Optional[Union[Graph, CSRGraph]] = None  # the graph this worker answers queries against
+
+
+# pool initializer, runs once per worker process. Other pools over one graph (e.g. all_pairs) share it
+def load_graph(graph: Union[Graph, CSRGraph]) -> None:
+    global _graph
+    _graph = graph
+
+
+# the graph load_graph gave this worker
+def worker_graph() -> Union[Graph, CSRGraph]:
+    return _graph
+
+
+def _shortest_path(query: Query) -> Optional[List[V]]:
+    start, goal = query
+    if not _graph.connected(start, goal):
+        return None  # no need to exhaust the start's component to find that out
+    result: Optional[Node[V]]
+    if isinstance(_graph, WeightedGraph) or (isinstance(_graph, CSRGraph) and _graph.weighted):
+        result = astar(start, lambda v: v == goal, _graph.neighbors_for_vertex, lambda _: 0.0,
+                       cost=_graph.weight_between)
+    else:
+        result = bfs(start, lambda v: v == goal, _graph.neighbors_for_vertex)
+    return None if result is None else node_to_path(result)
+
+
+def batch_paths(graph: Union[Graph[V], WeightedGraph[V], CSRGraph[V]], queries: Sequence[Query],
+                processes: Optional[int] = None, chunksize: Optional[int] = None) -> List[Optional[List[V]]]:
+    """
+    :param graph: the graph to search. It must not be modified while the batch runs.
+    :param queries: (start, goal) vertex pairs.
+    :param processes: number of worker processes, defaults to the number of cores.
+    :param chunksize: queries sent to a worker at a time. Defaults to spreading the batch ~4 chunks per worker.
+    :return: the path for each query in input order, or None where there is no path.
+    """
+    processes = processes or cpu_count()
+    if chunksize is None:
+        chunksize = max(1, len(queries) // (processes * 4))
+    with Pool(processes, initializer=load_graph, initargs=(graph,)) as pool:
+        return pool.map(_shortest_path, queries, chunksize)
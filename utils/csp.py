@@ -1,5 +1,6 @@
-from typing import Generic, TypeVar, Dict, List, Optional
+from typing import Generic, TypeVar, Dict, List, Optional, Callable
 from abc import ABC, abstractmethod
+from utils.instrumentation import SearchStats
 
 V = TypeVar("V")  # define type-var V for variables in csp problem
 
@@ -51,8 +52,9 @@ class CSP(Generic[V, D]):
                 return False
         return True
 
-    # recursive depth first search variation to find solution
-    def backtracking_search(self, assignment: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
+    # recursive depth first search variation to find solution. pass stats to record the work done
+    def backtracking_search(self, assignment: Dict[V, D] = {},
+                            stats: Optional[SearchStats] = None) -> Optional[Dict[V, D]]:
         # assignment is complete if every variable is assigned (base case)
         if len(assignment) == len(self.variables):
             return assignment
@@ -62,12 +64,18 @@ class CSP(Generic[V, D]):
 
         # get every possible domain value of the first unassigned variable
         first: V = unassigned[0]
+        consistent: Callable[[V, Dict[V, D]], bool] = self.consistent
+        if stats is not None:
+            stats.expand(first, len(assignment) + 1)
+            consistent = stats.constraints(consistent)
         for value in self.domains[first]:
             local_assignment = assignment.copy()
             local_assignment[first] = value
             # if we're still consistent, we recurse (continue searching)
-            if self.consistent(first, local_assignment):
-                result: Optional[Dict[V, D]] = self.backtracking_search(local_assignment)
+            if consistent(first, local_assignment):
+                if stats is not None:
+                    stats.generate(first)
+                result: Optional[Dict[V, D]] = self.backtracking_search(local_assignment, stats)
                 if result is not None:  # if we didn't find the result, we will end up backtracking
                     return result
         return None
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from typing import TypeVar, Generic, List, Optional, Dict, Tuple, Union, Any, Sequence, Iterator
+from utils.graph import Edge, Graph
+from utils.union_find import UnionFind
+from utils.weighted_graph import WeightedEdge, WeightedGraph
+
+"""
+COMPRESSED SPARSE ROW GRAPH
+An immutable graph stored as three flat arrays instead of lists of Edge objects. The edges leaving vertex i are
+targets[offsets[i]:offsets[i + 1]] (with matching weights for weighted graphs), so an edge costs 4-8 bytes for its
+target plus 8 for its weight rather than a few hundred bytes for a dataclass instance. CSRGraph offers the same
+read API as Graph/WeightedGraph, so searches and dijkstra/mst run on it unchanged; Edge objects are only built when
+edges_for_index is asked for them. Build one with Graph.freeze().
+
+ON DISK FORMAT
+save() writes a fixed header, then the offsets, targets and weights arrays in native layout (each starting on an 8 byte
+boundary), then the pickled vertex list. CSRGraph.open() maps the file read-only and casts memoryviews straight over the
+mapped arrays, so nothing but the vertex list is copied and every process that opens the same file shares one copy in
+the page cache. A mapped graph pickles as its path, so pool workers reopen the mapping instead of receiving a copy.
+"""
+
+# magic, format version, weighted flag, targets typecode, byte order, vertex count, edge count, vertex table position
+_HEADER: struct.Struct = struct.Struct("<4sHBcB3xQQQ")
+_MAGIC: bytes = b"CSRG"
+_FORMAT_VERSION: int = 1
+_DATA_START: int = 64  # arrays start here, the header is padded out to it
+_LITTLE, _BIG = 0, 1
+
+# Define TypeVar V to represent vertices in the graph
+V = TypeVar("V")
+
+
+class CSRGraph(Generic[V]):
+    def __init__(self, vertices: List[V], offsets: Sequence[int], targets: Sequence[int],
+                 weights: Optional[Sequence[float]] = None, path: Optional[str] = None) -> None:
+        """
+        :param vertices: vertex at each index.
+        :param offsets: edges of vertex i are targets[offsets[i]:offsets[i + 1]], an array or memoryview of int64.
+        :param targets: index of the vertex each edge leads to.
+        :param weights: weight of each edge, or None for an unweighted graph.
+        :param path: the file the arrays are mapped from, set by open().
+        """
+        if len(offsets) != len(vertices) + 1:
+            raise ValueError("CSRGraph needs exactly one offset per vertex plus one.")
+        self._vertices: List[V] = vertices
+        self._indices: Dict[V, int] = {vertex: index for index, vertex in enumerate(vertices)}
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        # memoryviews let neighbor_indices/weights_for_index hand out slices without copying
+        self._target_view: memoryview = memoryview(targets)
+        self._weight_view: Optional[memoryview] = None if weights is None else memoryview(weights)
+        self._path: Optional[str] = path
+        self._components: Optional[UnionFind] = None  # built on the first connectivity query
+
+    @classmethod
+    def from_graph(cls, graph: Graph[V]) -> CSRGraph[V]:
+        weighted: bool = isinstance(graph, WeightedGraph)
+        offsets: array = array("q", [0])
+        targets: array = array("i" if graph.vertex_count < 2 ** 31 else "q")
+        weights: Optional[array] = array("d") if weighted else None
+        for index in range(graph.vertex_count):
+            edges: List[Edge] = graph.edges_for_index(index)
+            targets.extend(edge.v for edge in edges)
+            if weights is not None:
+                weights.extend(edge.weight for edge in edges)
+            offsets.append(len(targets))
+        return cls([graph.vertex_at(i) for i in range(graph.vertex_count)], offsets, targets, weights)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self._vertices)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._targets)
+
+    @property
+    def weighted(self) -> bool:
+        return self._weights is not None
+
+    # a frozen graph never changes, so caches keyed on the version never go stale
+    @property
+    def version(self) -> int:
+        return 0
+
+    # the raw offsets/targets/weights arrays (memoryviews for a mapped graph)
+    @property
+    def arrays(self) -> Tuple[Sequence[int], Sequence[int], Optional[Sequence[float]]]:
+        return self._offsets, self._targets, self._weights
+
+    def vertex_at(self, index: int) -> V:
+        return self._vertices[index]
+
+    def index_of(self, vertex: V) -> int:
+        index: Optional[int] = self._indices.get(vertex)
+        if index is None:
+            raise ValueError(f"{vertex} is not in the graph.")
+        return index
+
+    def _union_find(self) -> UnionFind:
+        if self._components is None:
+            self._components = UnionFind.from_edges(self.vertex_count, ((u, v) for u in range(self.vertex_count)
+                                                                        for v in self.neighbor_indices(u)))
+        return self._components
+
+    def connected(self, first: V, second: V) -> bool:
+        return self._union_find().connected(self.index_of(first), self.index_of(second))
+
+    # connected, but only if that is already known: None rather than building the union-find over the whole graph
+    def connected_if_known(self, first: V, second: V) -> Optional[bool]:
+        if self._components is None:
+            return None
+        return self._components.connected(self.index_of(first), self.index_of(second))
+
+    @property
+    def component_count(self) -> int:
+        return self._union_find().count
+
+    def component_sizes(self) -> List[int]:
+        return self._union_find().sizes()
+
+    # zero copy view of the indices of the vertices connected to the vertex at index
+    def neighbor_indices(self, index: int) -> memoryview:
+        return self._target_view[self._offsets[index]:self._offsets[index + 1]]
+
+    # zero copy view of the edge weights matching neighbor_indices
+    def weights_for_index(self, index: int) -> memoryview:
+        if self._weight_view is None:
+            raise TypeError("This graph is not weighted.")
+        return self._weight_view[self._offsets[index]:self._offsets[index + 1]]
+
+    def neighbors_for_index(self, index: int) -> List[V]:
+        return [self._vertices[v] for v in self.neighbor_indices(index)]
+
+    def neighbors_for_vertex(self, vertex: V) -> List[V]:
+        return self.neighbors_for_index(self.index_of(vertex))
+
+    def neighbors_for_index_with_weights(self, index: int) -> List[Tuple[V, float]]:
+        return [(self._vertices[v], w) for v, w in zip(self.neighbor_indices(index), self.weights_for_index(index))]
+
+    # lazy accessors matching Graph/WeightedGraph, they iterate the array slices directly
+    def iter_neighbor_indices(self, index: int) -> Iterator[int]:
+        return iter(self.neighbor_indices(index))
+
+    def iter_neighbors_for_index(self, index: int) -> Iterator[V]:
+        return map(self._vertices.__getitem__, self.neighbor_indices(index))
+
+    def iter_neighbors_for_vertex(self, vertex: V) -> Iterator[V]:
+        return self.iter_neighbors_for_index(self.index_of(vertex))
+
+    def iter_neighbor_indices_with_weights(self, index: int) -> Iterator[Tuple[int, float]]:
+        return zip(self.neighbor_indices(index), self.weights_for_index(index))
+
+    def iter_neighbors_for_index_with_weights(self, index: int) -> Iterator[Tuple[V, float]]:
+        return zip(map(self._vertices.__getitem__, self.neighbor_indices(index)), self.weights_for_index(index))
+
+    # builds Edge (or WeightedEdge) objects on demand, prefer neighbor_indices/weights_for_index in hot loops
+    def edges_for_index(self, index: int) -> Union[List[Edge], List[WeightedEdge]]:
+        if self._weight_view is None:
+            return [Edge(index, v) for v in self.neighbor_indices(index)]
+        return [WeightedEdge(index, v, w) for v, w in zip(self.neighbor_indices(index), self.weights_for_index(index))]
+
+    def edges_for_vertex(self, vertex: V) -> Union[List[Edge], List[WeightedEdge]]:
+        return self.edges_for_index(self.index_of(vertex))
+
+    # weight of the cheapest edge between two vertices, usable as the cost function for astar
+    def weight_between(self, first: V, second: V) -> float:
+        u: int = self.index_of(first)
+        v: int = self.index_of(second)
+        weights: List[float] = [w for t, w in zip(self.neighbor_indices(u), self.weights_for_index(u)) if t == v]
+        if not weights:
+            raise LookupError(f"There is no edge between {first} and {second}.")
+        return min(weights)
+
+    def save(self, path: str) -> None:
+        targets: memoryview = self._target_view
+        with open(path, "wb") as file:
+            table: bytes = pickle.dumps(self._vertices, pickle.HIGHEST_PROTOCOL)
+            sections: List[memoryview] = [memoryview(self._offsets).cast("B"), targets.cast("B")]
+            if self._weight_view is not None:
+                sections.append(self._weight_view.cast("B"))
+            file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, self.weighted, targets.format.encode(),
+                                    _LITTLE if sys.byteorder == "little" else _BIG, self.vertex_count, self.edge_count,
+                                    _DATA_START + sum(_padded(len(section)) for section in sections)))
+            file.write(bytes(_DATA_START - _HEADER.size))
+            for section in sections:
+                file.write(section)
+                file.write(bytes(_padded(len(section)) - len(section)))
+            file.write(table)
+
+    @classmethod
+    def open(cls, path: str) -> CSRGraph[Any]:
+        """
+        :param path: a file written by save().
+        :return: a graph whose arrays are read-only views over the memory mapped file.
+        """
+        with open(path, "rb") as file:
+            mapped: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, weighted, typecode, byteorder, vertex_count, edge_count, table = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a CSRGraph file this version can read.")
+        if byteorder != (_LITTLE if sys.byteorder == "little" else _BIG):
+            raise ValueError(f"{path} was written on a machine with a different byte order.")
+        view: memoryview = memoryview(mapped)
+        position: int = _DATA_START
+        sections: List[memoryview] = []
+        layout: List[Tuple[str, int]] = [("q", vertex_count + 1), (typecode.decode(), edge_count)]
+        if weighted:
+            layout.append(("d", edge_count))
+        for code, count in layout:
+            size: int = struct.calcsize(code) * count
+            sections.append(view[position:position + size].cast(code))
+            position += _padded(size)
+        vertices: List[Any] = pickle.loads(view[table:])
+        return cls(vertices, sections[0], sections[1], sections[2] if weighted else None, path)
+
+    # a mapped graph travels as its path so the receiving process maps the same file
+    def __reduce__(self) -> Tuple[Any, ...]:
+        if self._path is not None:
+            return CSRGraph.open, (self._path,)
+        return CSRGraph, (self._vertices, self._offsets, self._targets, self._weights)
+
+    def __str__(self) -> str:
+        desc: str = ""
+        for i in range(self.vertex_count):
+            neighbors = self.neighbors_for_index_with_weights(i) if self.weighted else self.neighbors_for_index(i)
+            desc += f"{self.vertex_at(i)} -> {neighbors}\n"
+        return desc
+
+
+# anything the weighted algorithms (dijkstra_to, all pairs, contraction hierarchies, landmarks) accept
+AnyWeightedGraph = Union[WeightedGraph[V], CSRGraph[V]]
+
+
+# round a section size up to the next multiple of 8 so every array starts aligned
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
@@ -1,7 +1,21 @@
 from __future__ import annotations
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from time import perf_counter
 from heapq import heappop, heappush
 from collections import deque
-from typing import TypeVar, Protocol, Iterable, Sequence, Generic, List, Set, Dict, Optional, Callable, Deque
+from math import log
+from itertools import count
+from typing import (TypeVar, Protocol, Iterable, Sequence, Generic, List, Set, Dict, Optional, Callable, Deque, Tuple,
+                    NamedTuple, Any, Generator, Union, Iterator)
+from utils.instrumentation import SearchStats
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, batch lookups fall back to pure Python without it
+    np = None
 
 # Define TypeVar for generic arguments
 T = TypeVar("T")
@@ -30,19 +44,23 @@ class Comparable(Protocol):
         return self > other or self == other
 
 
-# Generic Node class to represent any current state in the stack
+# Generic Node class to represent any current state in the stack. Slots keep each node small, and f(n) = g(n) + h(n)
+# is computed once here rather than on every heap comparison
 class Node(Generic[T]):
+    __slots__ = ("state", "parent", "cost", "heuristic", "f")
+
     def __init__(self, state: T, parent: Optional[Node], cost: float = 0.0, heuristic: float = 0.0):
         self.state = state
         self.parent = parent
         self.cost = cost
         self.heuristic = heuristic
+        self.f = cost + heuristic
 
     def __lt__(self, other: Node):
-        return (self.cost + self.heuristic) < (other.cost + other.heuristic)
+        return self.f < other.f
 
     def __gt__(self, other):
-        return (self.cost + self.heuristic) > (other.cost + other.heuristic)
+        return self.f > other.f
 
 
 # Generic Stack class for depth first searches
@@ -54,6 +72,9 @@ class Stack(Generic[T]):
     def empty(self) -> bool:
         return not self._container  # not will be true for an empty container
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def push(self, item: T) -> None:
         self._container.append(item)
 
@@ -73,6 +94,9 @@ class Queue(Generic[T]):
     def empty(self) -> bool:
         return not self._container
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def push(self, item: T) -> None:
         self._container.append(item)
 
@@ -93,6 +117,9 @@ class PriorityQueue(Generic[T]):
     def empty(self) -> bool:
         return not self._container
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def push(self, item: T) -> None:
         heappush(self._container, item)  # in by priority ( priority = lowest f(n). f(n) = g(n) + h(n) )
 
@@ -103,6 +130,159 @@ class PriorityQueue(Generic[T]):
         return repr(self._container)
 
 
+# Priority queue that orders items by an explicit priority instead of comparing the items themselves. Entries are flat
+# (priority, tiebreak, counter, item) tuples, so heap comparisons stay on floats and remaining ties come out in
+# insertion order
+class KeyedPriorityQueue(Generic[T]):
+    def __init__(self) -> None:
+        self._container: List[Tuple[float, float, int, T]] = []
+        self._counter = count()
+
+    @property
+    def empty(self) -> bool:
+        return not self._container
+
+    def __len__(self) -> int:
+        return len(self._container)
+
+    # lowest priority comes out first, then lowest tiebreak
+    def push(self, item: T, priority: float, tiebreak: float = 0.0) -> None:
+        heappush(self._container, (priority, tiebreak, next(self._counter), item))
+
+    def pop(self) -> T:
+        return heappop(self._container)[3]
+
+    def __repr__(self) -> str:
+        return repr(self._container)
+
+
+# Maps states onto integer codes so the compact engine can keep its bookkeeping in flat arrays instead of Node chains
+class StateEncoding(Generic[T], ABC):
+    # number of distinct codes, or None when codes are handed out as new states are discovered
+    @property
+    def size(self) -> Optional[int]:
+        return None
+
+    @abstractmethod
+    def encode(self, state: T) -> int:
+        pass
+
+    @abstractmethod
+    def decode(self, code: int) -> T:
+        pass
+
+
+# Encoding for states that have no natural integer form. Codes are assigned in discovery order
+class IndexedEncoding(StateEncoding[T]):
+    def __init__(self) -> None:
+        self._codes: Dict[T, int] = {}
+        self._states: List[T] = []
+
+    def encode(self, state: T) -> int:
+        code: Optional[int] = self._codes.get(state)
+        if code is None:
+            code = len(self._states)
+            self._codes[state] = code
+            self._states.append(state)
+        return code
+
+    def decode(self, code: int) -> T:
+        return self._states[code]
+
+
+# Row-major encoding for (row, col) grid states. factory rebuilds the state type, e.g. MazeLocation
+class GridEncoding(StateEncoding[T]):
+    def __init__(self, rows: int, columns: int, factory: Callable[[int, int], T]) -> None:
+        self._rows = rows
+        self._columns = columns
+        self._factory = factory
+
+    @property
+    def size(self) -> Optional[int]:
+        return self._rows * self._columns
+
+    def encode(self, state: T) -> int:
+        return state[0] * self._columns + state[1]
+
+    def decode(self, code: int) -> T:
+        return self._factory(*divmod(code, self._columns))
+
+
+"""
+VISITED SETS
+dfs and bfs keep a visited set and astar a closed set. By default these are Python sets of the states themselves, but
+anything with add and __contains__ will do. BitsetVisited stores one bit per state for states that map onto dense
+integer indices (grid cells, graph vertex indices). BloomVisited is approximate: it uses a fixed number of bits no
+matter how many states are added, at the price of rare false positives, where an unseen state is treated as seen and
+skipped. That can hide the goal or a state on the only path to it, so it only suits dfs and bfs where missing the
+occasional state is acceptable. astar requires an exact closed set and rejects a BloomVisited.
+"""
+
+
+class VisitedSet(Protocol[T]):
+    def add(self, state: T) -> None:
+        ...
+
+    def __contains__(self, state: T) -> bool:
+        ...
+
+
+# one bit per state. index maps a state to 0 <= i < size, e.g. an encoding's encode function
+class BitsetVisited(Generic[T]):
+    def __init__(self, size: int, index: Callable[[T], int]) -> None:
+        self._bits = bytearray((size + 7) // 8)
+        self._index = index
+
+    @classmethod
+    def for_encoding(cls, encoding: StateEncoding[T]) -> BitsetVisited[T]:
+        if encoding.size is None:
+            raise ValueError("BitsetVisited needs an encoding with a fixed size.")
+        return cls(encoding.size, encoding.encode)
+
+    def add(self, state: T) -> None:
+        i: int = self._index(state)
+        self._bits[i >> 3] |= 1 << (i & 7)
+
+    def __contains__(self, state: T) -> bool:
+        i: int = self._index(state)
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+
+# Bloom filter sized for capacity states at the given false positive rate
+class BloomVisited(Generic[T]):
+    _MASK: int = (1 << 64) - 1
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        if capacity <= 0:
+            raise ValueError("BloomVisited needs a positive capacity.")
+        if not 0 < error_rate < 1:
+            raise ValueError("BloomVisited needs an error rate between 0 and 1.")
+        self._size: int = max(8, int(-capacity * log(error_rate) / (log(2) ** 2)))  # bits
+        self._hashes: int = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    # double hashing: every probe is derived from two well mixed 64 bit values of the state's hash
+    def _start_and_step(self, state: T) -> Tuple[int, int]:
+        h: int = hash(state) & self._MASK
+        return (h * 0x9E3779B97F4A7C15) & self._MASK, (((h ^ (h >> 31)) * 0xBF58476D1CE4E5B9) & self._MASK) | 1
+
+    def add(self, state: T) -> None:
+        probe, step = self._start_and_step(state)
+        for _ in range(self._hashes):
+            i: int = probe % self._size
+            self._bits[i >> 3] |= 1 << (i & 7)
+            probe += step
+
+    def __contains__(self, state: T) -> bool:
+        probe, step = self._start_and_step(state)
+        for _ in range(self._hashes):
+            i: int = probe % self._size
+            if not self._bits[i >> 3] & (1 << (i & 7)):
+                return False
+            probe += step
+        return True
+
+
 # Traditional linear utils (o(n))
 def linear_contains(iterable: Iterable[T], key: T) -> bool:
     for item in iterable:
@@ -127,6 +307,52 @@ def binary_contains(sequence: Sequence[C], key: C) -> bool:
     return False
 
 
+# Batch binary utils: look up many keys in one sorted sequence. With numpy this is a single vectorized searchsorted
+# and the results are numpy arrays, otherwise it falls back to bisect and returns lists
+def batch_binary_contains(sequence: Sequence[C], keys: Sequence[C]) -> Tuple[Sequence[bool], Sequence[int]]:
+    """
+    :param sequence: sorted sequence to search.
+    :param keys: keys to look up.
+    :return: (mask, positions). mask[i] is True if keys[i] is in sequence, positions[i] is where keys[i] is or would
+    be inserted to keep sequence sorted (the leftmost such position).
+    """
+    if np is not None:
+        table = np.asarray(sequence)
+        query = np.asarray(keys)
+        positions = np.searchsorted(table, query, side="left")
+        mask = positions < len(table)
+        mask[mask] = table[positions[mask]] == query[mask]
+        return mask, positions
+
+    positions: List[int] = [bisect_left(sequence, key) for key in keys]
+    mask: List[bool] = [p < len(sequence) and sequence[p] == key for p, key in zip(positions, keys)]
+    return mask, positions
+
+
+# Index over unsorted data for repeated membership queries. Building it is O(n), each lookup after that is O(1)
+class HashedIndex(Generic[T]):
+    def __init__(self, iterable: Iterable[T]) -> None:
+        self._positions: Dict[T, int] = {}
+        for position, item in enumerate(iterable):
+            self._positions.setdefault(item, position)  # keep the first position of duplicates
+
+    def __contains__(self, key: T) -> bool:
+        return key in self._positions
+
+    def contains_many(self, keys: Iterable[T]) -> Tuple[List[bool], List[int]]:
+        """
+        :param keys: keys to look up.
+        :return: (mask, positions). positions[i] is the first index of keys[i] in the indexed data, or -1.
+        """
+        positions: List[int] = [self._positions.get(key, -1) for key in keys]
+        return [p >= 0 for p in positions], positions
+
+
+# Batch hashed utils for unsorted data. Builds a HashedIndex once, use HashedIndex directly to reuse it across batches
+def batch_hashed_contains(iterable: Iterable[T], keys: Iterable[T]) -> Tuple[List[bool], List[int]]:
+    return HashedIndex(iterable).contains_many(keys)
+
+
 def node_to_path(node: Node[T]) -> List[T]:
     path: List[T] = [node.state]
     # work back-words from end to front
@@ -137,92 +363,688 @@ def node_to_path(node: Node[T]) -> List[T]:
     return path
 
 
+# the cost of a move when a search is not given an edge cost function
+def unit_cost(_: T, __: T) -> float:
+    return 1.0  # 1 assumes a grid so one move in any direction
+
+
+# rebuild a Node chain from a plain path so compact results can still be handed to node_to_path
+def path_to_node(path: List[T], cost: Callable[[T, T], float] = unit_cost) -> Node[T]:
+    node: Optional[Node[T]] = None
+    for state in path:
+        node = Node(state, None) if node is None else Node(state, node, node.cost + cost(node.state, state))
+    return node
+
+
 # Depth First Search using Stack class
-def dfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]) -> Optional[Node]:
+def dfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+        encoding: Optional[StateEncoding[T]] = None, stats: Optional[SearchStats] = None,
+        visited: Optional[VisitedSet[T]] = None) -> Optional[Node]:
     """
     :param initial: initial node we will be starting from.
     :param goal_test: function that will check if we have found a path to the goal.
-    :param successors: function that will return a list of the current nodes children.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param encoding: optional state encoding. When given the array-backed compact engine is used instead.
+    :param stats: optional SearchStats to record the work done.
+    :param visited: optional empty VisitedSet to track seen states in, e.g. a BitsetVisited. Defaults to a set.
     :return: Node if there is a path, otherwise None.
     """
+    if encoding is not None:
+        path: Optional[List[T]] = compact_dfs(initial, goal_test, successors, encoding, stats)
+        return None if path is None else path_to_node(path)
+
+    if stats is not None:
+        successors = stats.successors(successors)
     frontier: Stack[Node[T]] = Stack()
     frontier.push(Node(initial, None))  # add the first node with no parents since it is the starting place
-    visited: Set[T] = {initial}  # add the initial node into the visited set since we'll start there
+    if visited is None:
+        visited = set()
+    visited.add(initial)  # add the initial node into the visited set since we'll start there
 
     # While there is more to explore, keep exploring
     while not frontier.empty:
         current_node: Node[T] = frontier.pop()
         current_state: T = current_node.state
+        if stats is not None:
+            stats.expand(current_state, len(frontier) + 1)
         # if we've found the goal, we're done
         if goal_test(current_state):
             return current_node
         # check where to go next based on what we haven't explored
         for child in successors(current_state):
             if child in visited:  # Check if the current cell has been visited
+                if stats is not None:
+                    stats.duplicate_hits += 1
                 continue  # skip children since we've already explored them
             visited.add(child)
             frontier.push(Node(child, current_node))
+            if stats is not None:
+                stats.generate(child)
 
     return None
 
 
 # Breadth first utils using the Queue class
-def bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]) -> Optional[Node]:
+def bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+        encoding: Optional[StateEncoding[T]] = None, stats: Optional[SearchStats] = None,
+        visited: Optional[VisitedSet[T]] = None) -> Optional[Node]:
     """
     :param initial: initial node we will be starting from.
     :param goal_test: function that will check if we have found a path to the goal.
-    :param successors: function that will return a list of the current nodes children.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param encoding: optional state encoding. When given the array-backed compact engine is used instead.
+    :param stats: optional SearchStats to record the work done.
+    :param visited: optional empty VisitedSet to track seen states in, e.g. a BitsetVisited. Defaults to a set.
     :return: Node if there is a path, otherwise None.
     """
+    if encoding is not None:
+        path: Optional[List[T]] = compact_bfs(initial, goal_test, successors, encoding, stats)
+        return None if path is None else path_to_node(path)
+
+    if stats is not None:
+        successors = stats.successors(successors)
     frontier: Queue[T] = Queue()
     frontier.push(Node(initial, None))  # add the first node with no parents since it is the starting place
-    visited: Set[T] = {initial}  # add the initial node into the visited set since we'll start there
+    if visited is None:
+        visited = set()
+    visited.add(initial)  # add the initial node into the visited set since we'll start there
 
     # While there is more to explore, keep exploring
     while not frontier.empty:
         current_node: Node[T] = frontier.pop()
         current_state: T = current_node.state
+        if stats is not None:
+            stats.expand(current_state, len(frontier) + 1)
         # if we've found the goal, we're done
         if goal_test(current_state):
             return current_node
         # check where to go next based on what we haven't explored
         for child in successors(current_state):
             if child in visited:  # Check if the current cell has been visited
+                if stats is not None:
+                    stats.duplicate_hits += 1
                 continue  # skip children since we've already explored them
             visited.add(child)
             frontier.push(Node(child, current_node))
+            if stats is not None:
+                stats.generate(child)
 
     return None
 
 
 # A*Star utils using PriorityQueue class
-def astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]],
-          heuristic: Callable[[T], float]) -> Optional[Node[T]]:
+def astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+          heuristic: Callable[[T], float], encoding: Optional[StateEncoding[T]] = None,
+          cost: Callable[[T, T], float] = unit_cost, stats: Optional[SearchStats] = None,
+          closed: Optional[VisitedSet[T]] = None) -> Optional[Node[T]]:
     """
-    :param heuristic:
+    :param heuristic: estimated cost from a state to the goal. Closed states are never re-expanded, so it should be
+    consistent for the result to be optimal.
     :param initial: initial node we will be starting from.
     :param goal_test: function that will check if we have found a path to the goal.
-    :param successors: function that will return a list of the current nodes children.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param encoding: optional state encoding. When given the array-backed compact engine is used instead.
+    :param cost: cost of moving between two adjacent states, e.g. WeightedGraph.weight_between. Defaults to 1.
+    :param stats: optional SearchStats to record the work done.
+    :param closed: optional empty VisitedSet to track expanded states in, e.g. a BitsetVisited. Defaults to a set. It
+    must be exact: a false positive could skip a state on the optimal path, so a BloomVisited raises ValueError.
     :return: Node if there is a path, otherwise None.
     """
+    if isinstance(closed, BloomVisited):
+        raise ValueError("astar needs an exact closed set, a Bloom filter can skip states on the optimal path.")
+    if encoding is not None:
+        path: Optional[List[T]] = compact_astar(initial, goal_test, successors, heuristic, encoding, cost, stats)
+        return None if path is None else path_to_node(path, cost)
 
-    frontier: PriorityQueue[T] = PriorityQueue()
-    frontier.push(Node(initial, None, heuristic=heuristic(initial)))  # add the first node with no parents
-    visited: Dict[T, float] = {initial: 0.0}  # add initial to the visited set with no cost
+    if stats is not None:
+        successors = stats.successors(successors)
+    # ordered by f(n), preferring deeper nodes (higher g(n)) on ties since they are closer to finishing
+    frontier: KeyedPriorityQueue[Node[T]] = KeyedPriorityQueue()
+    initial_node: Node[T] = Node(initial, None, heuristic=heuristic(initial))
+    frontier.push(initial_node, initial_node.f)  # add the first node with no parents
+    # cheapest known cost of each state on the frontier. Expanded states move to closed, so with a compact closed set
+    # only the frontier costs a dict entry
+    visited: Dict[T, float] = {initial: 0.0}
+    if closed is None:
+        closed = set()  # states that have already been expanded with their cheapest cost
 
     # While there are more nodes to explore, continue exploring
     while not frontier.empty:
         current_node: Node[T] = frontier.pop()
         current_state: T = current_node.state
+        # skip states we have already expanded, and stale entries that were superseded by a cheaper push
+        if current_state in closed or current_node.cost > visited[current_state]:
+            continue
+        if stats is not None:
+            stats.expand(current_state, len(frontier) + 1)
         # if we've found the goal, we're done
         if goal_test(current_state):
             return current_node
+        closed.add(current_state)
+        del visited[current_state]
         # check where we can go next and haven't visited yet
         for child in successors(current_state):
-            new_cost: float = current_node.cost + 1  # 1 assumes a grid so one move in any direction
+            if child in closed:
+                if stats is not None:
+                    stats.duplicate_hits += 1
+                continue
+            new_cost: float = current_node.cost + cost(current_state, child)
             if child not in visited or visited[child] > new_cost:
                 # we have now found a shorter path since it has a lesser cost. update dictionary
                 visited[child] = new_cost
-                frontier.push(Node(child, current_node, new_cost, heuristic(child)))
+                child_node: Node[T] = Node(child, current_node, new_cost, heuristic(child))
+                frontier.push(child_node, child_node.f, -new_cost)
+                if stats is not None:
+                    stats.generate(child)
+            elif stats is not None:
+                stats.duplicate_hits += 1
+
+    return None
+
+
+"""
+MEMORY BOUNDED SEARCH
+astar keeps every state it has seen in memory. idastar trades CPU for memory by running repeated depth first searches
+with a growing f(n) bound, so it only ever holds the current path. Plain IDA* re-explores every duplicate path though,
+so it can also be given a memory_limit: up to that many states are remembered (with the cheapest cost they were reached
+at) during each pass, and paths that reach a remembered state at no better cost are cut. This gives a configurable
+trade between the two extremes with a hard cap on memory.
+"""
+
+
+# one depth first pass of IDA*. Returns the goal node if one is within bound, otherwise the smallest f(n) that was cut
+def _bounded_dfs(root: Node[T], bound: float, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+                 heuristic: Callable[[T], float], cost: Callable[[T, T], float],
+                 memory_limit: int) -> Tuple[Optional[Node[T]], float]:
+    next_bound: float = float("inf")
+    on_path: Set[T] = {root.state}  # reject cycles along the current path
+    remembered: Dict[T, float] = {root.state: 0.0}  # cheapest cost each state was reached at during this pass
+    stack: List[Tuple[Node[T], Iterator[T]]] = [(root, iter(successors(root.state)))]
+
+    while stack:
+        node, children = stack[-1]
+        child: Optional[T] = next(children, None)
+        if child is None:  # every child of node has been tried, backtrack
+            stack.pop()
+            on_path.discard(node.state)
+            continue
+        if child in on_path:
+            continue
+        child_node: Node[T] = Node(child, node, node.cost + cost(node.state, child), heuristic(child))
+        f: float = child_node.cost + child_node.heuristic
+        if f > bound:
+            next_bound = min(next_bound, f)
+            continue
+        if goal_test(child):
+            return child_node, bound
+        # a path at least as cheap already searched below this state with at least as much of the bound left
+        seen: Optional[float] = remembered.get(child)
+        if seen is not None and seen <= child_node.cost:
+            continue
+        if seen is not None or len(remembered) < memory_limit:
+            remembered[child] = child_node.cost
+        on_path.add(child)
+        stack.append((child_node, iter(successors(child))))
+
+    return None, next_bound
+
+
+# Iterative deepening A*. Memory use is proportional to the depth of the solution plus at most memory_limit states
+def idastar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+            heuristic: Callable[[T], float], cost: Callable[[T, T], float] = unit_cost,
+            memory_limit: int = 0) -> Optional[Node[T]]:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param heuristic: admissible estimate of the cost from a state to the goal.
+    :param cost: cost of moving between two adjacent states. Defaults to 1.
+    :param memory_limit: how many states each pass may remember to cut duplicate paths. 0 is plain IDA*.
+    :return: Node if there is a path, otherwise None.
+    """
+    root: Node[T] = Node(initial, None, heuristic=heuristic(initial))
+    if goal_test(initial):
+        return root
+
+    bound: float = root.heuristic
+    while bound != float("inf"):
+        found, bound = _bounded_dfs(root, bound, goal_test, successors, heuristic, cost, memory_limit)
+        if found is not None:
+            return found
+    return None
+
+
+"""
+COMPACT SEARCH ENGINE
+The compact engine works on integer codes produced by a StateEncoding. Instead of allocating a Node per discovered
+state, it keeps a parent code (and for A* a cost) per state in flat arrays, and only decodes the states that end up on
+the final path. The frontier holds plain ints, so memory per state drops to a handful of bytes.
+"""
+
+_UNSEEN: int = -2  # parent value for states that have not been discovered
+_ROOT: int = -1  # parent value for the initial state
+
+
+# pick the smallest signed typecode that can hold every code
+def _index_typecode(size: Optional[int]) -> str:
+    return "i" if size is not None and size < 2 ** 31 else "q"
+
+
+# make sure an array is long enough to be indexed by code, doubling to keep growth amortized O(1)
+def _ensure(values: array, code: int, fill) -> None:
+    if code >= len(values):
+        values.extend(array(values.typecode, [fill]) * max(code + 1 - len(values), len(values)))
+
+
+def _new_parents(encoding: StateEncoding) -> array:
+    size: Optional[int] = encoding.size
+    return array(_index_typecode(size), [_UNSEEN]) * (size or 0)
+
+
+# walk the parent array back from the goal and decode the states on the way
+def _codes_to_path(parents: array, code: int, encoding: StateEncoding[T]) -> List[T]:
+    path: List[T] = [encoding.decode(code)]
+    while parents[code] != _ROOT:
+        code = parents[code]
+        path.append(encoding.decode(code))
+    path.reverse()
+    return path
+
+
+# Depth first search over encoded states
+def compact_dfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+                encoding: StateEncoding[T], stats: Optional[SearchStats] = None) -> Optional[List[T]]:
+    """
+    :param initial: initial state we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current states children, as a list or any iterable.
+    :param encoding: maps states to integer codes and back.
+    :param stats: optional SearchStats to record the work done.
+    :return: list of states from initial to goal if there is a path, otherwise None.
+    """
+    if stats is not None:
+        successors = stats.successors(successors)
+    parents: array = _new_parents(encoding)
+    start: int = encoding.encode(initial)
+    _ensure(parents, start, _UNSEEN)
+    parents[start] = _ROOT
+    frontier: List[int] = [start]
+
+    while frontier:
+        code: int = frontier.pop()
+        state: T = encoding.decode(code)
+        if stats is not None:
+            stats.expand(state, len(frontier) + 1)
+        if goal_test(state):
+            return _codes_to_path(parents, code, encoding)
+        for child in successors(state):
+            child_code: int = encoding.encode(child)
+            _ensure(parents, child_code, _UNSEEN)
+            if parents[child_code] != _UNSEEN:
+                if stats is not None:
+                    stats.duplicate_hits += 1
+                continue
+            parents[child_code] = code
+            frontier.append(child_code)
+            if stats is not None:
+                stats.generate(child)
+
+    return None
+
+
+# Breadth first search over encoded states
+def compact_bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+                encoding: StateEncoding[T], stats: Optional[SearchStats] = None) -> Optional[List[T]]:
+    """
+    :param initial: initial state we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current states children, as a list or any iterable.
+    :param encoding: maps states to integer codes and back.
+    :param stats: optional SearchStats to record the work done.
+    :return: list of states from initial to goal if there is a path, otherwise None.
+    """
+    if stats is not None:
+        successors = stats.successors(successors)
+    parents: array = _new_parents(encoding)
+    start: int = encoding.encode(initial)
+    _ensure(parents, start, _UNSEEN)
+    parents[start] = _ROOT
+    frontier: Deque[int] = deque([start])
+
+    while frontier:
+        code: int = frontier.popleft()
+        state: T = encoding.decode(code)
+        if stats is not None:
+            stats.expand(state, len(frontier) + 1)
+        if goal_test(state):
+            return _codes_to_path(parents, code, encoding)
+        for child in successors(state):
+            child_code: int = encoding.encode(child)
+            _ensure(parents, child_code, _UNSEEN)
+            if parents[child_code] != _UNSEEN:
+                if stats is not None:
+                    stats.duplicate_hits += 1
+                continue
+            parents[child_code] = code
+            frontier.append(child_code)
+            if stats is not None:
+                stats.generate(child)
+
+    return None
+
+
+# A* search over encoded states. The heap holds (f, tiebreak, g, code) tuples rather than Nodes
+def compact_astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+                  heuristic: Callable[[T], float], encoding: StateEncoding[T],
+                  cost: Callable[[T, T], float] = unit_cost,
+                  stats: Optional[SearchStats] = None) -> Optional[List[T]]:
+    """
+    :param initial: initial state we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current states children, as a list or any iterable.
+    :param heuristic: consistent estimate of the cost from a state to the goal.
+    :param encoding: maps states to integer codes and back.
+    :param cost: cost of moving between two adjacent states. Defaults to 1.
+    :param stats: optional SearchStats to record the work done.
+    :return: list of states from initial to goal if there is a path, otherwise None.
+    """
+    if stats is not None:
+        successors = stats.successors(successors)
+    parents: array = _new_parents(encoding)
+    costs: array = array("d", [float("inf")]) * len(parents)
+    closed: array = array("b", [0]) * len(parents)
+    start: int = encoding.encode(initial)
+    _ensure(parents, start, _UNSEEN)
+    _ensure(costs, start, float("inf"))
+    _ensure(closed, start, 0)
+    parents[start] = _ROOT
+    costs[start] = 0.0
+    tiebreak = count()
+    frontier: List[Tuple[float, int, float, int]] = [(heuristic(initial), next(tiebreak), 0.0, start)]
+
+    while frontier:
+        _, _, g, code = heappop(frontier)
+        if g > costs[code] or closed[code]:
+            continue  # stale entry or already expanded
+        state: T = encoding.decode(code)
+        if stats is not None:
+            stats.expand(state, len(frontier) + 1)
+        if goal_test(state):
+            return _codes_to_path(parents, code, encoding)
+        closed[code] = 1
+        for child in successors(state):
+            child_code: int = encoding.encode(child)
+            _ensure(parents, child_code, _UNSEEN)
+            _ensure(costs, child_code, float("inf"))
+            _ensure(closed, child_code, 0)
+            if closed[child_code]:
+                if stats is not None:
+                    stats.duplicate_hits += 1
+                continue
+            new_cost: float = g + cost(state, child)
+            if new_cost < costs[child_code]:
+                costs[child_code] = new_cost
+                parents[child_code] = code
+                heappush(frontier, (new_cost + heuristic(child), next(tiebreak), new_cost, child_code))
+                if stats is not None:
+                    stats.generate(child)
+            elif stats is not None:
+                stats.duplicate_hits += 1
+
+    return None
+
+
+"""
+BIDIRECTIONAL SEARCH
+Point to point searches explore a ball around the start whose size grows exponentially with depth. Searching from both
+ends at once and meeting in the middle explores two balls of half the radius instead. The backward search walks
+predecessors, which for undirected graphs (and mazes) are just the successors, so predecessors defaults to successors.
+"""
+
+
+# stitch the forward parents (initial -> meet) and backward parents (meet -> goal) into one Node chain
+def _join_paths(meet: T, forward_parents: Dict[T, Optional[T]], backward_parents: Dict[T, Optional[T]],
+                cost: Callable[[T, T], float] = unit_cost) -> Node[T]:
+    path: List[T] = []
+    state: Optional[T] = meet
+    while state is not None:
+        path.append(state)
+        state = forward_parents[state]
+    path.reverse()
+    state = backward_parents[meet]
+    while state is not None:
+        path.append(state)
+        state = backward_parents[state]
+    return path_to_node(path, cost)
+
+
+# expand one full layer of a breadth first frontier, stopping as soon as it touches the other side
+def _expand_layer(layer: List[T], successors: Callable[[T], Iterable[T]], parents: Dict[T, Optional[T]],
+                  other_parents: Dict[T, Optional[T]]) -> Tuple[List[T], Optional[T]]:
+    next_layer: List[T] = []
+    for state in layer:
+        for child in successors(state):
+            if child in parents:
+                continue
+            parents[child] = state
+            if child in other_parents:  # both searches have reached child, so it's the meeting point
+                return next_layer, child
+            next_layer.append(child)
+    return next_layer, None
+
+
+# Bidirectional breadth first search. Always grows the smaller of the two frontiers
+def bidirectional_bfs(initial: T, goal: T, successors: Callable[[T], Iterable[T]],
+                      predecessors: Optional[Callable[[T], Iterable[T]]] = None) -> Optional[Node[T]]:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal: the state we are searching for. Unlike bfs this must be a concrete state, not a test.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param predecessors: function returning the states that lead into a state. None means the graph is undirected.
+    :return: Node if there is a path, otherwise None.
+    """
+    if predecessors is None:
+        predecessors = successors
+    if initial == goal:
+        return Node(initial, None)
+
+    forward_parents: Dict[T, Optional[T]] = {initial: None}
+    backward_parents: Dict[T, Optional[T]] = {goal: None}
+    forward: List[T] = [initial]
+    backward: List[T] = [goal]
+
+    while forward and backward:
+        if len(forward) <= len(backward):
+            forward, meet = _expand_layer(forward, successors, forward_parents, backward_parents)
+        else:
+            backward, meet = _expand_layer(backward, predecessors, backward_parents, forward_parents)
+        if meet is not None:
+            return _join_paths(meet, forward_parents, backward_parents)
+
+    return None
+
+
+# Bidirectional A*. Both directions use the average of the two heuristics as a potential, which keeps the reduced edge
+# costs non-negative (for consistent heuristics) so the search can stop once the two frontiers can't beat the best path
+def bidirectional_astar(initial: T, goal: T, successors: Callable[[T], Iterable[T]], heuristic: Callable[[T], float],
+                        reverse_heuristic: Callable[[T], float],
+                        predecessors: Optional[Callable[[T], Iterable[T]]] = None,
+                        cost: Callable[[T, T], float] = unit_cost) -> Optional[Node[T]]:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal: the state we are searching for.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param heuristic: consistent estimate of the cost from a state to goal.
+    :param reverse_heuristic: consistent estimate of the cost from initial to a state.
+    :param predecessors: function returning the states that lead into a state. None means the graph is undirected.
+    :param cost: cost of moving from one state to an adjacent one. Defaults to 1.
+    :return: Node if there is a path, otherwise None.
+    """
+    if predecessors is None:
+        predecessors = successors
+
+    def potential(state: T) -> float:
+        return (heuristic(state) - reverse_heuristic(state)) / 2
+
+    tiebreak = count()
+    costs: Tuple[Dict[T, float], Dict[T, float]] = ({initial: 0.0}, {goal: 0.0})
+    parents: Tuple[Dict[T, Optional[T]], Dict[T, Optional[T]]] = ({initial: None}, {goal: None})
+    frontiers: Tuple[List[Tuple[float, int, T]], List[Tuple[float, int, T]]] = (
+        [(potential(initial), next(tiebreak), initial)], [(-potential(goal), next(tiebreak), goal)])
+    expand: Tuple[Callable[[T], Iterable[T]], Callable[[T], Iterable[T]]] = (successors, predecessors)
+    # the backward search walks edges in reverse, so the move it relaxes is child -> state
+    moves: Tuple[Callable[[T, T], float], Callable[[T, T], float]] = (cost, lambda state, child: cost(child, state))
+    signs: Tuple[int, int] = (1, -1)  # the backward potential is the negated forward potential
+    best: float = 0.0 if initial == goal else float("inf")
+    meet: Optional[T] = initial if initial == goal else None
+
+    while frontiers[0] and frontiers[1]:
+        # no remaining pair of frontier nodes can produce a path cheaper than the one we already have
+        if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+            break
+        side: int = 0 if frontiers[0][0][0] <= frontiers[1][0][0] else 1
+        key, _, state = heappop(frontiers[side])
+        g: float = costs[side][state]
+        if key > g + signs[side] * potential(state):
+            continue  # stale entry, a cheaper one for this state was pushed later
+        other_costs: Dict[T, float] = costs[1 - side]
+        for child in expand[side](state):
+            new_cost: float = g + moves[side](state, child)
+            if child not in costs[side] or costs[side][child] > new_cost:
+                costs[side][child] = new_cost
+                parents[side][child] = state
+                heappush(frontiers[side], (new_cost + signs[side] * potential(child), next(tiebreak), child))
+                if child in other_costs and new_cost + other_costs[child] < best:
+                    best = new_cost + other_costs[child]
+                    meet = child
+
+    if meet is None:
+        return None
+    return _join_paths(meet, parents[0], parents[1], cost)
+
+
+"""
+STREAMING SEARCH
+Generator versions of dfs, bfs and astar. Each expansion yields a SearchEvent, so callers can stream progress or stop
+whenever they like. max_nodes and time_limit bound the work done; when a budget runs out the generator returns a
+SearchResult holding the best partial node found so far (closest to the goal by heuristic, or the last node expanded
+when there is no heuristic). Use run_search to drain a generator and get the result directly.
+"""
+
+
+class SearchEvent(NamedTuple):
+    state: Any
+    depth: int
+    frontier_size: int
+
+
+@dataclass
+class SearchResult(Generic[T]):
+    node: Optional[Node[T]]  # the goal node, or the best partial node if the search stopped early
+    found: bool  # True if node satisfies the goal test
+    reason: str  # "goal", "exhausted", "node budget" or "time budget"
+    expanded: int  # number of nodes expanded
+
+
+SearchStream = Generator[SearchEvent, None, SearchResult[T]]
+
+
+# shared loop for the streaming searches. Frontier entries end in (node, depth), a priority queue puts (f, tiebreak)
+# in front of them. costs is only given for astar, where it is used to drop stale entries
+def _stream(frontier: Union[Stack, Queue, PriorityQueue], goal_test: Callable[[T], bool],
+            successors: Callable[[T], Iterable[T]], heuristic: Optional[Callable[[T], float]],
+            cost: Callable[[T, T], float], costs: Optional[Dict[T, float]], max_nodes: Optional[int],
+            time_limit: Optional[float]) -> SearchStream:
+    deadline: Optional[float] = None if time_limit is None else perf_counter() + time_limit
+    visited: Set[T] = set()
+    tiebreak = count()
+    best: Optional[Node[T]] = None
+    expanded: int = 0
+
+    while not frontier.empty:
+        if max_nodes is not None and expanded >= max_nodes:
+            return SearchResult(best, False, "node budget", expanded)
+        if deadline is not None and perf_counter() >= deadline:
+            return SearchResult(best, False, "time budget", expanded)
+        current_node, depth = frontier.pop()[-2:]
+        current_state: T = current_node.state
+        if costs is not None and (current_node.cost > costs[current_state] or current_state in visited):
+            continue  # stale entry or already expanded
+        visited.add(current_state)
+        expanded += 1
+        yield SearchEvent(current_state, depth, len(frontier))
+        if goal_test(current_state):
+            return SearchResult(current_node, True, "goal", expanded)
+        if heuristic is None or best is None or current_node.heuristic < best.heuristic:
+            best = current_node
+        for child in successors(current_state):
+            if child in visited:
+                continue
+            new_cost: float = current_node.cost + cost(current_state, child)
+            if costs is None:
+                visited.add(child)  # dfs and bfs mark states when they are discovered
+                frontier.push((Node(child, current_node, new_cost), depth + 1))
+            elif child not in costs or costs[child] > new_cost:
+                costs[child] = new_cost
+                node: Node[T] = Node(child, current_node, new_cost, heuristic(child))
+                frontier.push((new_cost + node.heuristic, next(tiebreak), node, depth + 1))
+
+    return SearchResult(best, False, "exhausted", expanded)
+
+
+def dfs_stream(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+               max_nodes: Optional[int] = None, time_limit: Optional[float] = None) -> SearchStream:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param max_nodes: stop after expanding this many nodes.
+    :param time_limit: stop after this many seconds of wall clock time.
+    :return: generator of SearchEvents that returns a SearchResult.
+    """
+    frontier: Stack[Tuple[Node[T], int]] = Stack()
+    frontier.push((Node(initial, None), 0))
+    return _stream(frontier, goal_test, successors, None, unit_cost, None, max_nodes, time_limit)
+
+
+def bfs_stream(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+               max_nodes: Optional[int] = None, time_limit: Optional[float] = None) -> SearchStream:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param max_nodes: stop after expanding this many nodes.
+    :param time_limit: stop after this many seconds of wall clock time.
+    :return: generator of SearchEvents that returns a SearchResult.
+    """
+    frontier: Queue[Tuple[Node[T], int]] = Queue()
+    frontier.push((Node(initial, None), 0))
+    return _stream(frontier, goal_test, successors, None, unit_cost, None, max_nodes, time_limit)
+
+
+def astar_stream(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Iterable[T]],
+                 heuristic: Callable[[T], float], cost: Callable[[T, T], float] = unit_cost,
+                 max_nodes: Optional[int] = None, time_limit: Optional[float] = None) -> SearchStream:
+    """
+    :param initial: initial node we will be starting from.
+    :param goal_test: function that will check if we have found a path to the goal.
+    :param successors: function that will return the current nodes children, as a list or any iterable.
+    :param heuristic: estimated cost from a state to the goal. Also ranks partial results.
+    :param cost: cost of moving between two adjacent states. Defaults to 1.
+    :param max_nodes: stop after expanding this many nodes.
+    :param time_limit: stop after this many seconds of wall clock time.
+    :return: generator of SearchEvents that returns a SearchResult.
+    """
+    frontier: PriorityQueue[Tuple[float, int, Node[T], int]] = PriorityQueue()
+    initial_node: Node[T] = Node(initial, None, heuristic=heuristic(initial))
+    frontier.push((initial_node.heuristic, -1, initial_node, 0))
+    return _stream(frontier, goal_test, successors, heuristic, cost, {initial: 0.0}, max_nodes, time_limit)
+
 
-    return None
\ No newline at end of file
+# drain a streaming search, discarding its events, and hand back the SearchResult
+def run_search(search: SearchStream) -> SearchResult[T]:
+    while True:
+        try:
+            next(search)
+        except StopIteration as stop:
+            return stop.value
@@ -1,8 +1,40 @@
 from __future__ import annotations
+import csv
+import gc
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import TypeVar, Generic, List, Optional
+from enum import Enum
+from operator import attrgetter
+from typing import TypeVar, Generic, List, Optional, Dict, Iterable, Iterator, Tuple, Callable, Sequence, Any, \
+    Deque, NamedTuple, TYPE_CHECKING
 from utils.generic_search import bfs, node_to_path, Node
+from utils.union_find import UnionFind
 
+if TYPE_CHECKING:
+    from utils.csr_graph import CSRGraph
+
+
+"""
+BULK LOADING
+from_edges, from_csv and from_arrays build a whole graph in one pass over an edge list. Vertices are added the first
+time they appear (or up front if a vertex list is given), and rows are consumed one at a time, so a CSV file is streamed
+rather than read into memory. add_edges appends many edges to an existing graph the same way. The cyclic garbage
+collector is paused while edges are added: it would otherwise rescan the growing adjacency lists over and over, which
+roughly doubles load time for large graphs.
+
+CHANGES
+Every mutation bumps the graph's version and is described by a GraphChange, which is appended to a bounded change log
+and passed to every subscribed listener. A cache can either subscribe, or remember a version and later ask
+changes_since(version) for what happened in between; None means the log no longer reaches back that far (or a bulk load
+happened) and the cache should rebuild. Removing a vertex moves the last vertex into its index so the other indices stay
+dense, which is reported as a REMOVE_VERTEX change with u the freed index and v the old index of the moved vertex.
+
+CONNECTIVITY
+connected and component_sizes are answered from a union-find over the vertex indices. It is built on first use, then
+kept up to date as vertices and edges are added; a removal (or a bulk load) drops it and the next query rebuilds it.
+Checking connected before a search turns an unreachable goal into an O(1) answer instead of a full traversal.
+"""
 
 # Define TypeVar V to represent vertices in the graph
 V = TypeVar("V")
@@ -20,10 +52,43 @@ class Edge:
         return f"{self.u} -> {self.v}"
 
 
+class ChangeKind(str, Enum):
+    ADD_VERTEX = "add_vertex"
+    REMOVE_VERTEX = "remove_vertex"
+    ADD_EDGE = "add_edge"
+    REMOVE_EDGE = "remove_edge"
+    UPDATE_WEIGHT = "update_weight"
+
+
+class GraphChange(NamedTuple):
+    version: int  # the graph's version after the change
+    kind: ChangeKind
+    u: int
+    v: int = -1  # -1 for changes to a single vertex
+    weight: Optional[float] = None  # weight of the edge for weighted graphs, the new weight for UPDATE_WEIGHT
+    previous: Optional[float] = None  # the old weight for UPDATE_WEIGHT
+
+
+Listener = Callable[[GraphChange], None]
+
+
 class Graph(Generic[V]):
+    change_log_size: int = 1024  # how many changes changes_since can look back over
+
     def __init__(self, vertices: List[V] = []) -> None:
-        self._vertices = vertices
-        self._edges = [[] for _ in vertices]
+        self._vertices: List[V] = []
+        self._indices: Dict[V, int] = {}  # vertex -> index, kept in sync with _vertices for O(1) lookups
+        self._edges: List[List[Edge]] = []
+        self._version: int = 0  # bumped on every change so caches built on this graph know when they are stale
+        self._changes: Deque[GraphChange] = deque(maxlen=self.change_log_size)
+        self._log_start: int = 0  # oldest version changes_since can answer for
+        self._listeners: List[Listener] = []
+        self._components: Optional[UnionFind] = None  # built lazily by _union_find
+        # the initial vertices are a bulk load: no per vertex changes, one version bump for the lot
+        for vertex in vertices:
+            self._append_vertex(vertex)
+        if vertices:
+            self._bulk_loaded(False)
 
     @property
     def vertex_count(self) -> int:
@@ -33,10 +98,203 @@ class Graph(Generic[V]):
     def edge_count(self) -> int:
         return sum(map(len, self._edges))
 
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # call listener with every GraphChange from now on, returns a function that unsubscribes it
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    # listeners are often closures and the union-find is rebuilt on demand, so neither travels when the graph is
+    # pickled, e.g. to a process pool. A copy starts with no subscribers
+    def __getstate__(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = self.__dict__.copy()
+        state["_listeners"] = []
+        state["_components"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    # the changes made after version, or None if the log does not reach back that far
+    def changes_since(self, version: int) -> Optional[List[GraphChange]]:
+        if version < self._log_start:
+            return None
+        return [change for change in self._changes if change.version > version]
+
+    # bump the version, log the change and tell the listeners
+    def _changed(self, kind: ChangeKind, u: int, v: int = -1, weight: Optional[float] = None,
+                 previous: Optional[float] = None) -> None:
+        self._version += 1
+        change: GraphChange = GraphChange(self._version, kind, u, v, weight, previous)
+        if len(self._changes) == self._changes.maxlen:
+            self._log_start = self._changes[0].version
+        self._changes.append(change)
+        if self._components is not None:
+            if kind is ChangeKind.ADD_VERTEX:
+                self._components.add()
+            elif kind is ChangeKind.ADD_EDGE:
+                self._components.union(u, v)
+            elif kind is not ChangeKind.UPDATE_WEIGHT:
+                self._components = None  # union-find cannot split sets, rebuild on the next query
+        for listener in self._listeners:
+            listener(change)
+
+    # add a new vertex with no edges and return its index
+    def add_vertex(self, vertex: V) -> int:
+        index: int = self._append_vertex(vertex)
+        self._changed(ChangeKind.ADD_VERTEX, index)
+        return index
+
+    # add_vertex without recording the change, for bulk loads
+    def _append_vertex(self, vertex: V) -> int:
+        if vertex in self._indices:
+            raise ValueError(f"{vertex} is already in the graph.")
+        index: int = len(self._vertices)
+        self._vertices.append(vertex)
+        self._indices[vertex] = index
+        self._edges.append([])
+        return index
+
     # This is an undirected graph so we will add edges in both directions
     def add_edge(self, edge: Edge) -> None:
         self._edges[edge.u].append(edge)
         self._edges[edge.v].append(edge.reversed())
+        self._changed(ChangeKind.ADD_EDGE, edge.u, edge.v, getattr(edge, "weight", None))
+
+    # remove one edge between the vertices at u and v (both directions), returning it. O(degree of u and v)
+    def remove_edge_by_indices(self, u: int, v: int) -> Edge:
+        edge: Edge = self._pop_edge(u, v)
+        weight: Optional[float] = getattr(edge, "weight", None)
+        self._pop_edge(v, u, weight)  # the reverse copy, for a loop the second copy in the same list
+        self._changed(ChangeKind.REMOVE_EDGE, u, v, weight)
+        return edge
+
+    def remove_edge_by_vertices(self, first: V, second: V) -> Edge:
+        return self.remove_edge_by_indices(self.index_of(first), self.index_of(second))
+
+    def remove_edge(self, edge: Edge) -> Edge:
+        return self.remove_edge_by_indices(edge.u, edge.v)
+
+    # detach the first edge u -> v (with the given weight, if any) from u's adjacency list
+    def _pop_edge(self, u: int, v: int, weight: Optional[float] = None) -> Edge:
+        edges: List[Edge] = self._edges[u]
+        for position, edge in enumerate(edges):
+            if edge.v == v and (weight is None or edge.weight == weight):
+                return edges.pop(position)
+        raise LookupError(f"There is no edge between {self.vertex_at(u)} and {self.vertex_at(v)}.")
+
+    # remove a vertex and its edges. The last vertex takes over its index, so this costs O(degree) list work for the
+    # removed vertex's neighbors and the moved vertex's neighbors rather than renumbering the whole graph
+    def remove_vertex(self, vertex: V) -> None:
+        index: int = self.index_of(vertex)
+        # detach every edge first, so listeners never see one direction of an edge without the other
+        removed: List[Edge] = self._edges[index]
+        self._edges[index] = []
+        for neighbor in {edge.v for edge in removed if edge.v != index}:
+            self._edges[neighbor] = [back for back in self._edges[neighbor] if back.v != index]
+        loops: int = 0
+        for edge in removed:
+            if edge.v == index:
+                loops += 1
+                if loops % 2 == 0:
+                    continue  # each loop appears twice but is one edge
+            self._changed(ChangeKind.REMOVE_EDGE, index, edge.v, getattr(edge, "weight", None))
+        last: int = len(self._vertices) - 1
+        if index != last:
+            moved: V = self._vertices[last]
+            self._vertices[index] = moved
+            self._indices[moved] = index
+            self._edges[index] = self._edges[last]
+            for edge in self._edges[index]:
+                edge.u = index
+                if edge.v == last:
+                    edge.v = index  # a loop on the moved vertex
+                else:
+                    for back in self._edges[edge.v]:
+                        if back.v == last:
+                            back.v = index
+        self._vertices.pop()
+        self._edges.pop()
+        del self._indices[vertex]
+        self._changed(ChangeKind.REMOVE_VERTEX, index, last)
+
+    # add every (first, second) pair in edges, adding vertices that are not in the graph yet. returns the edge count
+    def add_edges(self, edges: Iterable[Tuple[V, V]]) -> int:
+        indices: Dict[V, int] = self._indices
+        adjacency: List[List[Edge]] = self._edges
+        notify: bool = bool(self._listeners)
+        add_vertex: Callable[[V], int] = self.add_vertex if notify else self._append_vertex
+        count: int = 0
+        with _gc_paused():
+            for first, second in edges:
+                u: Optional[int] = indices.get(first)
+                if u is None:
+                    u = add_vertex(first)
+                v: Optional[int] = indices.get(second)
+                if v is None:
+                    v = add_vertex(second)
+                adjacency[u].append(Edge(u, v))
+                adjacency[v].append(Edge(v, u))
+                if notify:
+                    self._changed(ChangeKind.ADD_EDGE, u, v)
+                count += 1
+        self._bulk_loaded(notify)
+        return count
+
+    # without listeners a bulk load skips the per edge changes, so the log can no longer describe the gap
+    def _bulk_loaded(self, notified: bool) -> None:
+        if not notified:
+            self._version += 1
+            self._changes.clear()
+            self._log_start = self._version
+            self._components = None
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[Any, ...]], vertices: Sequence[V] = ()) -> Graph[V]:
+        """
+        :param edges: rows of (first, second), or (first, second, weight) for a WeightedGraph.
+        :param vertices: optional vertex list, fixing the index order. Other vertices are added as they appear.
+        :return: the new graph
+        """
+        graph = cls(list(vertices))
+        graph.add_edges(edges)
+        return graph
+
+    @classmethod
+    def from_csv(cls, path: str, delimiter: Optional[str] = None, vertex_type: Callable[[str], V] = str,
+                 skip_header: bool = False) -> Graph[V]:
+        """
+        :param path: file with one edge per row: first, second (and weight for a WeightedGraph).
+        :param delimiter: field separator, defaults to a tab for .tsv files and a comma otherwise.
+        :param vertex_type: converts the vertex fields, e.g. int.
+        :param skip_header: ignore the first row.
+        :return: the new graph
+        """
+        if delimiter is None:
+            delimiter = "\t" if path.endswith(".tsv") else ","
+        with open(path, newline="") as file:
+            rows: Iterator[List[str]] = csv.reader(file, delimiter=delimiter)
+            if skip_header:
+                next(rows, None)
+            return cls.from_edges(cls._parse_row(row, vertex_type) for row in rows if row)
+
+    @classmethod
+    def from_arrays(cls, sources: Sequence[V], targets: Sequence[V], vertices: Sequence[V] = ()) -> Graph[V]:
+        """
+        :param sources: first vertex of each edge, a list or a NumPy array.
+        :param targets: second vertex of each edge.
+        :param vertices: optional vertex list, as in from_edges.
+        :return: the new graph
+        """
+        return cls.from_edges(zip(*_columns(sources, targets)), vertices)
+
+    # turn a csv row into an edge tuple for add_edges
+    @staticmethod
+    def _parse_row(row: List[str], vertex_type: Callable[[str], V]) -> Tuple[V, V]:
+        return vertex_type(row[0]), vertex_type(row[1])
 
     # add an edge by using vertices index
     def add_edge_by_indices(self, u: int, v: int) -> None:
@@ -45,26 +303,67 @@ class Graph(Generic[V]):
 
     # add an edge by looking up vertices index first (convenience method)
     def add_edge_by_vertices(self, first: V, second: V) -> None:
-        u: int = self._vertices.index(first)
-        v: int = self._vertices.index(second)
+        u: int = self.index_of(first)
+        v: int = self.index_of(second)
         self.add_edge_by_indices(u, v)
 
     # find a vertex at a specific index
     def vertex_at(self, index: int) -> V:
         return self._vertices[index]
 
+    # the union-find over vertex indices, rebuilt from the edges if a removal invalidated it
+    def _union_find(self) -> UnionFind:
+        if self._components is None:
+            self._components = UnionFind.from_edges(self.vertex_count, ((edge.u, edge.v) for edges in self._edges
+                                                                        for edge in edges))
+        return self._components
+
+    # True if there is a path between the two vertices
+    def connected(self, first: V, second: V) -> bool:
+        return self._union_find().connected(self.index_of(first), self.index_of(second))
+
+    # connected, but only if that is already known: None rather than building the union-find over the whole graph
+    def connected_if_known(self, first: V, second: V) -> Optional[bool]:
+        if self._components is None:
+            return None
+        return self._components.connected(self.index_of(first), self.index_of(second))
+
+    @property
+    def component_count(self) -> int:
+        return self._union_find().count
+
+    # the number of vertices in each connected component, largest first
+    def component_sizes(self) -> List[int]:
+        return self._union_find().sizes()
+
     # find the index of a vertex in the graph
     def index_of(self, vertex: V) -> int:
-        return self._vertices.index(vertex)
+        index: Optional[int] = self._indices.get(vertex)
+        if index is None:
+            raise ValueError(f"{vertex} is not in the graph.")
+        return index
 
     # find the vertices that a vertex at some index is connected to
     def neighbors_for_index(self, index: int) -> List[V]:
-        return list(map(self.vertex_at, [e.v for e in self._edges[index]]))
+        vertices: List[V] = self._vertices
+        return [vertices[e.v] for e in self._edges[index]]
 
     # Look up a Vertices index and find its neighbors (convenience method)
     def neighbors_for_vertex(self, vertex: V) -> List[V]:
         return self.neighbors_for_index(self.index_of(vertex))
 
+    # lazy versions of the above that build no lists, for successor functions in hot search loops. For short
+    # adjacency lists the list versions are about as fast; these win on high degree vertices and on CSRGraph.
+    # they read the adjacency list as it is iterated, so do not change the graph until they are exhausted
+    def iter_neighbor_indices(self, index: int) -> Iterator[int]:
+        return map(_target, self._edges[index])
+
+    def iter_neighbors_for_index(self, index: int) -> Iterator[V]:
+        return map(self._vertices.__getitem__, map(_target, self._edges[index]))
+
+    def iter_neighbors_for_vertex(self, vertex: V) -> Iterator[V]:
+        return self.iter_neighbors_for_index(self.index_of(vertex))
+
     # return all of the edges associated with a vertex at a certain index
     def edges_for_index(self, index: int) -> List[Edge]:
         return self._edges[index]
@@ -73,6 +372,17 @@ class Graph(Generic[V]):
     def edges_for_vertex(self, vertex: V) -> List[Edge]:
         return self.edges_for_index(self.index_of(vertex))
 
+    # snapshot the graph into an immutable, array backed CSRGraph with the same read API
+    def freeze(self) -> CSRGraph[V]:
+        from utils.csr_graph import CSRGraph  # imported here because csr_graph itself builds on this module
+        return CSRGraph.from_graph(self)
+
+    to_csr = freeze
+
+    # write the graph in the binary CSR format, reopen it memory mapped with CSRGraph.open
+    def save(self, path: str) -> None:
+        self.freeze().save(path)
+
     # make it easy pretty print a graph
     def __str__(self) -> str:
         desc: str = ""
@@ -82,6 +392,35 @@ class Graph(Generic[V]):
         return desc
 
 
+_target: Callable[[Edge], int] = attrgetter("v")
+
+
+# pause the cyclic garbage collector for the duration of a bulk load
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# NumPy arrays are converted with tolist(), which is much faster than iterating them and yields plain Python values
+def _as_list(values: Sequence[Any]) -> Sequence[Any]:
+    tolist: Optional[Callable[[], List[Any]]] = getattr(values, "tolist", None)
+    return values if tolist is None else tolist()
+
+
+# the parallel arrays of from_arrays as lists, which zip would silently cut to the shortest
+def _columns(*arrays: Sequence[Any]) -> List[Sequence[Any]]:
+    columns: List[Sequence[Any]] = [_as_list(values) for values in arrays]
+    if len({len(column) for column in columns}) > 1:
+        raise ValueError(f"from_arrays needs arrays of equal length, got {[len(column) for column in columns]}.")
+    return columns
+
+
 if __name__ == "__main__":
     city_graph: Graph[str] = Graph(["Seattle", "San Francisco", "Los Angeles", "Riverside", "Phoenix", "Chicago",
                                     "Boston", "New York", "Atlanta", "Miami", "Dallas", "Houston", "Detroit",
@@ -114,7 +453,7 @@ if __name__ == "__main__":
     city_graph.add_edge_by_vertices("New York", "Philadelphia")
     city_graph.add_edge_by_vertices("Philadelphia", "Washington")
 
-    bfs_result: Optional[Node[V]] = bfs("Boston", lambda x: x == "Miami", city_graph.neighbors_for_vertex)
+    bfs_result: Optional[Node[V]] = bfs("Boston", lambda x: x == "Miami", city_graph.iter_neighbors_for_vertex)
 
     if bfs_result is None:
         print("No solution!")
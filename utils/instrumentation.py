@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Optional, Sized, Tuple, TypeVar
+
+"""
+SEARCH INSTRUMENTATION
+Pass a SearchStats to dfs, bfs, astar (or CSP.backtracking_search) and it will be filled in as the search runs. When no
+stats object is given the searches skip all of this, so the hot loops only pay for a None check.
+"""
+
+R = TypeVar("R")
+
+
+@dataclass
+class SearchStats:
+    nodes_expanded: int = 0
+    nodes_generated: int = 0
+    peak_frontier: int = 0  # for backtracking_search this is the deepest assignment reached
+    duplicate_hits: int = 0  # children skipped because they had already been seen
+    successor_calls: int = 0
+    successor_time: float = 0.0
+    constraint_calls: int = 0
+    constraint_time: float = 0.0
+    # optional callbacks, called with the state (or CSP variable) being expanded or generated
+    on_expand: Optional[Callable[[Any], None]] = field(default=None, repr=False)
+    on_generate: Optional[Callable[[Any], None]] = field(default=None, repr=False)
+
+    def expand(self, state: Any, frontier_size: int) -> None:
+        self.nodes_expanded += 1
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if self.on_expand is not None:
+            self.on_expand(state)
+
+    def generate(self, state: Any) -> None:
+        self.nodes_generated += 1
+        if self.on_generate is not None:
+            self.on_generate(state)
+
+    # wrap a successors function so every call is counted and timed. A lazy result (an iterator or generator rather
+    # than a list) does its work while being iterated, so that iteration is timed too
+    def successors(self, successors: Callable[..., Iterable[R]]) -> Callable[..., Iterable[R]]:
+        @wraps(successors)
+        def timed(*args: Any) -> Iterable[R]:
+            start: float = perf_counter()
+            try:
+                children: Iterable[R] = successors(*args)
+            finally:
+                self.successor_calls += 1
+                self.successor_time += perf_counter() - start
+            return children if isinstance(children, Sized) else self._timed_iteration(children)
+
+        return timed
+
+    def _timed_iteration(self, children: Iterable[R]) -> Iterator[R]:
+        iterator: Iterator[R] = iter(children)
+        while True:
+            start: float = perf_counter()
+            try:
+                child: R = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.successor_time += perf_counter() - start
+            yield child
+
+    # wrap a constraint check so every call is counted and timed
+    def constraints(self, consistent: Callable[..., R]) -> Callable[..., R]:
+        @wraps(consistent)
+        def timed(*args: Any) -> R:
+            start: float = perf_counter()
+            try:
+                return consistent(*args)
+            finally:
+                self.constraint_calls += 1
+                self.constraint_time += perf_counter() - start
+
+        return timed
+
+
+# run a search with a fresh SearchStats and return it alongside the result
+def profile(search: Callable[..., R], *args: Any, **kwargs: Any) -> Tuple[R, SearchStats]:
+    stats: SearchStats = SearchStats()
+    return search(*args, stats=stats, **kwargs), stats
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, List, NamedTuple, Optional, Tuple, TypeVar
+from utils.generic_search import bfs, node_to_path, Node
+from utils.graph import Graph, V
+
+"""
+PATH CACHE
+Memoizes search results on one graph, keyed by (algorithm, start, goal). The cache remembers the graph's version when
+it filled its entries; as soon as the graph changes (add_edge bumps the version) every entry is dropped on the next
+lookup. Size is bounded, evicting the least recently used entry first. Single source results such as a dijkstra tree
+are cached under (algorithm, root, None) so that one tree can answer every later query from that root.
+"""
+
+R = TypeVar("R")
+
+CacheKey = Tuple[str, Hashable, Optional[Hashable]]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class PathCache(Generic[V]):
+    def __init__(self, graph: Graph[V], maxsize: int = 1024) -> None:
+        self._graph = graph
+        self._maxsize = maxsize
+        self._entries: OrderedDict[CacheKey, Any] = OrderedDict()
+        self._version: int = graph.version
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def graph(self) -> Graph[V]:
+        return self._graph
+
+    # drop everything if the graph has changed since the entries were computed
+    def _sync(self) -> None:
+        if self._graph.version != self._version:
+            self._entries.clear()
+            self._version = self._graph.version
+
+    # return the cached value for key, or compute, store and return it
+    def get_or_compute(self, key: CacheKey, compute: Callable[[], R]) -> R:
+        self._sync()
+        if key in self._entries:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self._misses += 1
+        value: R = compute()
+        self._entries[key] = value
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)  # least recently used
+        return value
+
+    # cache a single source result, e.g. dijkstra's (distances, paths), for every query from root
+    def tree(self, algorithm: str, root: V, compute: Callable[[], R]) -> R:
+        return self.get_or_compute((algorithm, root, None), compute)
+
+    # shortest path by number of edges, or None if goal can't be reached
+    def bfs_path(self, start: V, goal: V) -> Optional[List[V]]:
+        def compute() -> Optional[List[V]]:
+            result: Optional[Node[V]] = bfs(start, lambda v: v == goal, self._graph.neighbors_for_vertex)
+            return None if result is None else node_to_path(result)
+
+        return self.get_or_compute(("bfs", start, goal), compute)
+
+    def info(self) -> CacheInfo:
+        self._sync()
+        return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
@@ -0,0 +1,65 @@
+from typing import Iterable, List, Tuple
+
+"""
+UNION FIND
+Disjoint sets over the integers 0..n-1, used by Graph to answer connectivity questions without searching. find uses
+path halving and union links the smaller tree under the larger, so any sequence of operations runs in near constant
+amortized time per operation. Elements can be added but never removed; Graph rebuilds its sets after a removal.
+"""
+
+
+class UnionFind:
+    def __init__(self, size: int = 0) -> None:
+        self._parent: List[int] = list(range(size))
+        self._size: List[int] = [1] * size
+        self._count: int = size  # number of disjoint sets
+
+    @classmethod
+    def from_edges(cls, size: int, edges: Iterable[Tuple[int, int]]) -> "UnionFind":
+        sets: UnionFind = cls(size)
+        for u, v in edges:
+            sets.union(u, v)
+        return sets
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    # add a new singleton set and return its element
+    def add(self) -> int:
+        element: int = len(self._parent)
+        self._parent.append(element)
+        self._size.append(1)
+        self._count += 1
+        return element
+
+    # the representative of the set containing element
+    def find(self, element: int) -> int:
+        parent: List[int] = self._parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]  # path halving
+            element = parent[element]
+        return element
+
+    # merge the sets containing a and b, returns False if they were already the same set
+    def union(self, a: int, b: int) -> bool:
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        self._count -= 1
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    # size of every set, largest first
+    def sizes(self) -> List[int]:
+        return sorted((self._size[root] for root, parent in enumerate(self._parent) if root == parent), reverse=True)
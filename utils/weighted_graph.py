@@ -1,7 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import TypeVar, Generic, List, Tuple
-from utils.graph import Edge, Graph
+from operator import attrgetter
+from typing import TypeVar, Generic, List, Tuple, Dict, Iterable, Iterator, Optional, Sequence, Callable
+from utils.graph import Edge, Graph, ChangeKind, _columns, _gc_paused
 
 # Define TypeVar V to represent vertices in the graph
 V = TypeVar("V")
@@ -24,23 +25,86 @@ class WeightedEdge(Edge):
 
 class WeightedGraph(Generic[V], Graph[V]):
     def __init__(self, vertices: List[V] = []) -> None:
-        self._vertices: List[V] = vertices
-        self._edges: List[List[WeightedEdge]] = [[] for _ in vertices]
+        super().__init__(vertices)
+        self._edges: List[List[WeightedEdge]]
 
     def add_edge_by_indices(self, u: int, v: int, weight: float):
         edge: WeightedEdge = WeightedEdge(u, v, weight)
         self.add_edge(edge)  # this is a call to the graph class add edge
 
     def add_edge_by_vertices(self, first: V, second: V, weight: float) -> None:
-        u: int = self._vertices.index(first)
-        v: int = self._vertices.index(second)
+        u: int = self.index_of(first)
+        v: int = self.index_of(second)
         self.add_edge_by_indices(u, v, weight)
 
+    # add every (first, second, weight) row in edges, adding vertices that are not in the graph yet
+    def add_edges(self, edges: Iterable[Tuple[V, V, float]]) -> int:
+        indices: Dict[V, int] = self._indices
+        adjacency: List[List[WeightedEdge]] = self._edges
+        notify: bool = bool(self._listeners)
+        add_vertex: Callable[[V], int] = self.add_vertex if notify else self._append_vertex
+        count: int = 0
+        with _gc_paused():
+            for first, second, weight in edges:
+                u: Optional[int] = indices.get(first)
+                if u is None:
+                    u = add_vertex(first)
+                v: Optional[int] = indices.get(second)
+                if v is None:
+                    v = add_vertex(second)
+                adjacency[u].append(WeightedEdge(u, v, weight))
+                adjacency[v].append(WeightedEdge(v, u, weight))
+                if notify:
+                    self._changed(ChangeKind.ADD_EDGE, u, v, weight)
+                count += 1
+        self._bulk_loaded(notify)
+        return count
+
+    # set the weight of the edge between the vertices at u and v (both directions), returning the old weight
+    def update_weight_by_indices(self, u: int, v: int, weight: float) -> float:
+        forward: Optional[WeightedEdge] = next((edge for edge in self._edges[u] if edge.v == v), None)
+        if forward is None:
+            raise LookupError(f"There is no edge between {self.vertex_at(u)} and {self.vertex_at(v)}.")
+        previous: float = forward.weight
+        # the reverse copy has the same weight; for a loop it is the other copy in the same list
+        backward: WeightedEdge = next(edge for edge in self._edges[v]
+                                      if edge.v == u and edge.weight == previous and edge is not forward)
+        forward.weight = weight
+        backward.weight = weight
+        self._changed(ChangeKind.UPDATE_WEIGHT, u, v, weight, previous)
+        return previous
+
+    def update_weight(self, first: V, second: V, weight: float) -> float:
+        return self.update_weight_by_indices(self.index_of(first), self.index_of(second), weight)
+
+    @classmethod
+    def from_arrays(cls, sources: Sequence[V], targets: Sequence[V], weights: Sequence[float],
+                    vertices: Sequence[V] = ()) -> WeightedGraph[V]:
+        return cls.from_edges(zip(*_columns(sources, targets, weights)), vertices)
+
+    @staticmethod
+    def _parse_row(row: List[str], vertex_type: Callable[[str], V]) -> Tuple[V, V, float]:
+        return vertex_type(row[0]), vertex_type(row[1]), float(row[2])
+
+    # weight of the cheapest edge between two vertices, usable as the cost function for astar
+    def weight_between(self, first: V, second: V) -> float:
+        v: int = self.index_of(second)
+        weights: List[float] = [edge.weight for edge in self.edges_for_vertex(first) if edge.v == v]
+        if not weights:
+            raise LookupError(f"There is no edge between {first} and {second}.")
+        return min(weights)
+
     def neighbors_for_index_with_weights(self, index: int) -> List[Tuple[V, float]]:
-        distance_tuples: List[Tuple[V, float]] = []
-        for edge in self.edges_for_index(index):
-            distance_tuples.append((self.vertex_at(edge.v), edge.weight))
-        return distance_tuples
+        vertices: List[V] = self._vertices
+        return [(vertices[edge.v], edge.weight) for edge in self._edges[index]]
+
+    # lazy (neighbor index, weight) and (neighbor, weight) pairs, see Graph.iter_neighbors_for_index
+    def iter_neighbor_indices_with_weights(self, index: int) -> Iterator[Tuple[int, float]]:
+        return map(_target_and_weight, self._edges[index])
+
+    def iter_neighbors_for_index_with_weights(self, index: int) -> Iterator[Tuple[V, float]]:
+        vertices: List[V] = self._vertices
+        return ((vertices[edge.v], edge.weight) for edge in self._edges[index])
 
     def __str__(self) -> str:
         desc: str = ""
@@ -49,6 +113,8 @@ class WeightedGraph(Generic[V], Graph[V]):
         return desc
 
 
+_target_and_weight: Callable[[WeightedEdge], Tuple[int, float]] = attrgetter("v", "weight")
+
 WeightedPath = List[WeightedEdge]  # define type alias for the path
 
 